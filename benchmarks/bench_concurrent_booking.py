@@ -0,0 +1,122 @@
+"""Stress benchmark: parallel bookings from several processes and threads.
+
+Every worker books its own distinct slots (all must be stored) and then
+races every other worker for the same handful of contested slots (each must
+be won exactly once).  Exits non-zero if a booking was lost or duplicated.
+
+    python benchmarks/bench_concurrent_booking.py --procs 4 --threads 8 --bookings 50
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import multiprocessing as mp
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from medbot_store import AppointmentStore, SlotTakenError  # noqa: E402
+
+DATE = "2030-01-01"
+
+
+def _appt(patient, doctor, slot):
+    return {
+        "patient": patient,
+        "doctor": doctor,
+        "doctor_username": doctor,
+        "date": DATE,
+        "time": slot,
+        "symptom": "fever",
+        "status": "Pending",
+        "created_at": datetime.utcnow().isoformat(),
+    }
+
+
+def _worker(db_path, proc, threads, bookings, contested, barrier, results):
+    store = AppointmentStore(db_path)
+    won = []
+    errors = []
+
+    def run(t):
+        patient = f"p{proc}_{t}"
+        barrier.wait()
+        try:
+            for i in range(bookings):
+                store.add(_appt(patient, f"doc{proc}_{t}", f"slot{i}"))
+            for slot in range(contested):
+                try:
+                    store.add(_appt(patient, "contested", f"slot{slot}"))
+                    won.append(slot)
+                except SlotTakenError:
+                    pass
+        except Exception as e:  # a lost write would surface here (e.g. "database is locked")
+            errors.append(repr(e))
+
+    pool = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for th in pool:
+        th.start()
+    for th in pool:
+        th.join()
+    store.close()
+    results.put((proc, won, errors))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--procs", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--bookings", type=int, default=50, help="distinct bookings per thread")
+    parser.add_argument("--contested", type=int, default=5, help="slots every thread races for")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        AppointmentStore(db_path).close()  # create schema up front
+
+        barrier = mp.Barrier(args.procs * args.threads)
+        results = mp.Queue()
+        procs = [
+            mp.Process(target=_worker, args=(db_path, p, args.threads, args.bookings, args.contested, barrier, results))
+            for p in range(args.procs)
+        ]
+        started = time.perf_counter()
+        for p in procs:
+            p.start()
+        outcomes = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - started
+
+        store = AppointmentStore(db_path)
+        rows = store.all()
+        store.close()
+
+    workers = args.procs * args.threads
+    expected_distinct = workers * args.bookings
+    distinct = sum(1 for r in rows if r["doctor_username"] != "contested")
+    contested = [r["time"] for r in rows if r["doctor_username"] == "contested"]
+    won = sum(len(w) for _, w, _ in outcomes)
+    errors = [e for _, _, errs in outcomes for e in errs]
+    attempts = expected_distinct + workers * args.contested
+
+    print(f"{args.procs} processes x {args.threads} threads, {attempts} booking attempts in {elapsed:.2f}s "
+          f"({attempts / elapsed:.0f} attempts/s)")
+    print(f"distinct bookings stored: {distinct}/{expected_distinct}")
+    print(f"contested slots booked:   {len(contested)} (unique {len(set(contested))}, expected {args.contested}, "
+          f"winners reported {won})")
+    ok = (
+        not errors
+        and distinct == expected_distinct
+        and len(contested) == len(set(contested)) == args.contested == won
+    )
+    for e in errors[:5]:
+        print("error:", e)
+    print("OK" if ok else "FAILED: bookings were lost or duplicated")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
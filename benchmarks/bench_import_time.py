@@ -0,0 +1,63 @@
+"""Import-time guard: the Streamlit-free modules must start fast and stay light.
+
+Each module is imported in a fresh interpreter (several runs, median
+reported) and must neither pull in a heavy dependency (numpy, pandas,
+sklearn, joblib, streamlit) nor exceed the time budget.  Exits non-zero on a
+violation.
+
+    python benchmarks/bench_import_time.py --runs 5 --budget-ms 150
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ("medbot_store", "medbot_doctors", "medbot_nlp", "medbot_core", "medbot_api", "medbot_cli")
+HEAVY = ("numpy", "pandas", "sklearn", "joblib", "streamlit")
+
+_PROBE = """
+import sys, time, json
+t = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t
+print(json.dumps({{"ms": elapsed * 1000, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _measure(module):
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="maximum median import time per module")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args(argv)
+
+    ok = True
+    for module in args.modules:
+        runs = [_measure(module) for _ in range(args.runs)]
+        median = statistics.median(r["ms"] for r in runs)
+        heavy = sorted({m for r in runs for m in r["heavy"]})
+        status = "ok"
+        if heavy:
+            status = f"FAILED: imports {', '.join(heavy)}"
+        elif median > args.budget_ms:
+            status = f"FAILED: over {args.budget_ms:.0f} ms budget"
+        ok = ok and status == "ok"
+        print(f"{module:<16} {median:8.1f} ms  {status}")
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
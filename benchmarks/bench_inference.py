@@ -0,0 +1,81 @@
+"""Microbenchmark: per-message classification latency, sklearn vs NumPy engine.
+
+Classifies the ``intents.json`` patterns one message per call (the chat and
+API case) through ``model.predict_proba(vectorizer.transform([text]))`` and
+through ``medbot_model.NumpyEngine`` on a memory-mapped export, then both
+again as a single batch.  Reports per-message mean / median / p99 latency.
+
+    python benchmarks/bench_inference.py --rounds 20
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from medbot_model import NumpyEngine, export_model, load_compact_model  # noqa: E402
+from medbot_resources import INTENTS_PATH, load_resources  # noqa: E402
+
+
+def _texts():
+    with open(INTENTS_PATH, "r", encoding="utf-8") as f:
+        intents = json.load(f)
+    return [p.lower() for intent in intents.get("intents", []) for p in intent.get("patterns", [])]
+
+
+def _per_message(predict, texts, rounds):
+    samples = []
+    for _ in range(rounds):
+        for text in texts:
+            t = time.perf_counter()
+            predict([text])
+            samples.append(time.perf_counter() - t)
+    samples.sort()
+    return statistics.fmean(samples), samples[len(samples) // 2], samples[int(len(samples) * 0.99)]
+
+
+def _batch(predict, texts, rounds):
+    t = time.perf_counter()
+    for _ in range(rounds):
+        predict(texts)
+    return (time.perf_counter() - t) / (rounds * len(texts))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20, help="passes over the pattern set")
+    args = parser.parse_args(argv)
+    os.chdir(ROOT)
+
+    res = load_resources()
+    classes = res.model.classes_
+    tags = res.le.inverse_transform(classes) if hasattr(res.le, "classes_") else classes
+    texts = _texts()
+    with tempfile.TemporaryDirectory() as out:
+        export_model(res.model, res.vectorizer, tags, out)
+        engine = NumpyEngine(load_compact_model(out))
+        engines = {
+            "sklearn": lambda batch: res.model.predict_proba(res.vectorizer.transform(batch)),
+            "numpy": engine.predict_proba,
+        }
+        for predict in engines.values():   # warm-up
+            predict(texts)
+        print(f"{len(texts)} messages x {args.rounds} rounds")
+        print(f"{'engine':<8} {'mean':>10} {'median':>10} {'p99':>10} {'batched':>10}   (per message)")
+        results = {}
+        for name, predict in engines.items():
+            mean, median, p99 = _per_message(predict, texts, args.rounds)
+            batched = _batch(predict, texts, args.rounds)
+            results[name] = mean
+            print(f"{name:<8} {mean * 1e6:8.1f}us {median * 1e6:8.1f}us {p99 * 1e6:8.1f}us {batched * 1e6:8.1f}us")
+    print(f"speed-up per message: {results['sklearn'] / results['numpy']:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Parity check: the NumPy engine against the sklearn pipeline.
+
+Every pattern in ``intents.json`` is classified by
+``model.predict_proba(vectorizer.transform(...))`` and by
+``medbot_model.NumpyEngine`` over a fresh memory-mapped export of the same
+pickles; the predicted tags must be identical, the probabilities agree to
+``--tolerance`` and the engine's tokens equal the vectorizer analyzer's (the
+prediction cache keys on them).  The same is checked for a TF-IDF + naive
+Bayes pair fitted on the patterns (sublinear tf, l2 norm), which exercises
+the IDF and normalisation code the shipped CountVectorizer does not use.
+Exits non-zero on any mismatch.
+
+    python benchmarks/check_engine_parity.py
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from medbot_model import NumpyEngine, export_model, load_compact_model  # noqa: E402
+from medbot_resources import INTENTS_PATH, load_resources  # noqa: E402
+
+
+# texts sharing no vocabulary fall back to the class priors
+EXTRA_TEXTS = ["", "zzz qqq", "FEVER and Headache!!", "i-have a high fever & a bad cough"]
+
+
+def _labelled_patterns():
+    """(pattern, tag) for every pattern in intents.json."""
+    with open(INTENTS_PATH, "r", encoding="utf-8") as f:
+        intents = json.load(f)
+    return [(p, intent["tag"]) for intent in intents.get("intents", []) for p in intent.get("patterns", [])]
+
+
+def _compare(label, model, vectorizer, tags, texts, tolerance):
+    with tempfile.TemporaryDirectory() as out:
+        export_model(model, vectorizer, tags, out)
+        engine = NumpyEngine(load_compact_model(out))
+        expected = model.predict_proba(vectorizer.transform(texts))
+        got = engine.predict_proba(texts)
+        row = {c: i for i, c in enumerate(model.classes_)}
+        want_tags = [str(tags[row[c]]) for c in model.predict(vectorizer.transform(texts))]
+        got_tags = engine.tags[engine.predict(texts)]
+    # the prediction cache keys on engine.tokens(); it must match the vectorizer's analyzer
+    analyzer = vectorizer.build_analyzer()
+    wrong = [(t, w, g) for t, w, g in zip(texts, want_tags, got_tags) if w != g]
+    wrong += [(t, "tokens", "tokens") for t in texts if engine.tokens(t) != analyzer(t)]
+    diff = float(np.abs(expected - got).max()) if len(texts) else 0.0
+    ok = not wrong and diff <= tolerance
+    print(f"{label:<22} {len(texts):5d} texts  mismatches {len(wrong):3d}  max |dp| {diff:.2e}  {'ok' if ok else 'FAILED'}")
+    for text, want, got in wrong[:10]:
+        print(f"    {text!r}: sklearn {want!r}, numpy {got!r}")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tolerance", type=float, default=1e-9, help="maximum probability difference")
+    args = parser.parse_args(argv)
+    os.chdir(ROOT)
+
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+
+    res = load_resources()
+    pairs = _labelled_patterns()
+    texts = [p for p, _ in pairs] + EXTRA_TEXTS
+    classes = res.model.classes_
+    tags = res.le.inverse_transform(classes) if hasattr(res.le, "classes_") else classes
+    ok = _compare("shipped model", res.model, res.vectorizer, tags, texts, args.tolerance)
+
+    tfidf = TfidfVectorizer(sublinear_tf=True, norm="l2").fit([p for p, _ in pairs])
+    nb = MultinomialNB().fit(tfidf.transform([p for p, _ in pairs]), [t for _, t in pairs])
+    ok = _compare("tf-idf (sublinear, l2)", nb, tfidf, nb.classes_, texts, args.tolerance) and ok
+
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""Minimal JSON-over-HTTP API for MedBot (standard library only).
+
+Serves the functions of ``medbot_core`` without Streamlit, so a request costs
+one handler call instead of a script rerun and a websocket session::
+
+    python medbot_cli.py serve --port 8000
+
+    POST /classify    {"text": "..."} or {"texts": [...]}, optional "top_k", "min_confidence"
+    POST /recommend   {"symptom": "...", "top_n": 3}
+    POST /book        {"patient", "doctor_username", "time", "symptom", optional "date" (YYYY-MM-DD, not past)}
+    GET  /status?id=N
+    POST /status      {"id": N, "status": "Accepted" | "Rejected" | "Completed" | "Pending"}
+    GET  /health      also reports the prediction cache's hit/miss counters (fed by /classify)
+
+There is no authentication: bind it to localhost or put it behind a proxy
+that does.
+"""
+import json
+from datetime import date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import medbot_core as core
+from medbot_doctors import get_doctor_registry
+from medbot_nlp import MIN_CONFIDENCE, classify_batch, prediction_cache
+from medbot_resources import get_resources
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+MAX_BODY_BYTES = 1 << 20
+MAX_BATCH = 1000
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _require(body, *fields):
+    missing = [f for f in fields if body.get(f) in (None, "")]
+    if missing:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"missing field(s): {', '.join(missing)}")
+
+
+def _require_text(body, *fields):
+    """Like ``_require``, and the fields must be non-empty strings."""
+    _require(body, *fields)
+    wrong = [f for f in fields if not isinstance(body[f], str) or not body[f].strip()]
+    if wrong:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"field(s) must be non-empty strings: {', '.join(wrong)}")
+
+
+def _appt_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "id must be an integer") from None
+
+
+def _int_field(body, name, default, minimum=1):
+    value = body.get(name)
+    if value is None:
+        return default
+    try:
+        if isinstance(value, bool) or int(value) != float(value):
+            raise ValueError
+        value = int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be an integer") from None
+    if value < minimum:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be at least {minimum}")
+    return value
+
+
+def _probability_field(body, name, default):
+    value = body.get(name)
+    if value is None:
+        return default
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be a number") from None
+    if not 0.0 <= value <= 1.0:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be between 0 and 1")
+    return value
+
+
+# -----------------------------
+# endpoints: (body or query dict) -> (status, payload)
+# -----------------------------
+def classify(body):
+    texts = body.get("texts")
+    single = texts is None
+    if single:
+        _require(body, "text")
+        texts = [body["text"]]
+    if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "texts must be a list of strings")
+    if len(texts) > MAX_BATCH:
+        raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"at most {MAX_BATCH} texts per request")
+    results = classify_batch(
+        texts,
+        top_k=_int_field(body, "top_k", None),
+        min_confidence=_probability_field(body, "min_confidence", MIN_CONFIDENCE),
+        cache=prediction_cache,
+    )
+    return HTTPStatus.OK, results[0] if single else {"results": results}
+
+
+def recommend(body):
+    _require_text(body, "symptom")
+    top_n = _int_field(body, "top_n", 3)
+    return HTTPStatus.OK, {"doctors": core.recommend_doctors(body["symptom"], top_n)}
+
+
+def book(body):
+    _require_text(body, "patient", "doctor_username", "time", "symptom")
+    store = core.default_store()
+    doctor = get_doctor_registry(store).get(body["doctor_username"])
+    if doctor is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, "unknown doctor")
+    offered = doctor["slots"] or [core.OPEN_SLOT]
+    if body["time"] not in offered:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"time must be one of: {', '.join(offered)}")
+    try:
+        appt_date = date.fromisoformat(body["date"]) if body.get("date") else None
+    except (TypeError, ValueError):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "date must be YYYY-MM-DD") from None
+    # same rule as the booking form's date picker
+    if appt_date is not None and appt_date < date.today():
+        raise ApiError(HTTPStatus.BAD_REQUEST, "date must not be in the past")
+    appt = core.book_appointment(
+        body["patient"], doctor["name"], doctor["username"], body["time"], body["symptom"], appt_date, store=store,
+    )
+    if appt is None:
+        raise ApiError(HTTPStatus.CONFLICT, "slot already booked")
+    return HTTPStatus.CREATED, appt
+
+
+def get_status(query):
+    _require(query, "id")
+    appt = core.get_appointment(_appt_id(query["id"]))
+    if appt is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, "no such appointment")
+    return HTTPStatus.OK, appt
+
+
+def set_status(body):
+    _require(body, "id", "status")
+    appt_id, status = _appt_id(body["id"]), body["status"]
+    if status not in core.APPOINTMENT_STATUSES:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"status must be one of: {', '.join(core.APPOINTMENT_STATUSES)}")
+    if core.get_appointment(appt_id) is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, "no such appointment")
+    if status == "Completed":
+        # records the visit in the patient's history, once: only Accepted appointments qualify
+        if not core.mark_appointment_completed(appt_id):
+            raise ApiError(HTTPStatus.CONFLICT, "only Accepted appointments can be completed")
+    elif not core.update_appointment_status(appt_id, status):
+        raise ApiError(HTTPStatus.CONFLICT, "status not changed (slot taken or appointment removed)")
+    return HTTPStatus.OK, core.get_appointment(appt_id)
+
+
+def health(_query):
+    return HTTPStatus.OK, {"status": "ok", "prediction_cache": prediction_cache.stats()}
+
+
+ROUTES = {
+    ("POST", "/classify"): classify,
+    ("POST", "/recommend"): recommend,
+    ("POST", "/book"): book,
+    ("GET", "/status"): get_status,
+    ("POST", "/status"): set_status,
+    ("GET", "/health"): health,
+}
+
+
+class MedBotHandler(BaseHTTPRequestHandler):
+    # keep-alive: clients can reuse one connection for many requests
+    protocol_version = "HTTP/1.1"
+    server_version = "MedBotAPI/1.0"
+    # headers and body go out in separate writes; without TCP_NODELAY every
+    # keep-alive response would wait for the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+
+    def _send(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _content_length(self):
+        """The request body's size, validated before anything is read.
+
+        On error the body stays unread, so the connection is closed rather
+        than reused (its bytes would be parsed as the next request).
+        """
+        raw = self.headers.get("Content-Length")
+        if raw is None:
+            self.close_connection = True
+            raise ApiError(HTTPStatus.LENGTH_REQUIRED, "Content-Length required")
+        # isdigit() rejects "-1", "+5", "1e3" and "" that int() would accept or choke on
+        if not (raw.isascii() and raw.strip().isdigit()):
+            self.close_connection = True
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Content-Length must be a non-negative integer")
+        length = int(raw)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "request body too large")
+        return length
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        handler = ROUTES.get((method, url.path.rstrip("/") or "/"))
+        try:
+            if handler is None:
+                known = any(path == url.path.rstrip("/") for _, path in ROUTES)
+                raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED if known else HTTPStatus.NOT_FOUND, "no such endpoint")
+            if method == "POST":
+                length = self._content_length()
+                try:
+                    arg = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    raise ApiError(HTTPStatus.BAD_REQUEST, "body must be JSON") from None
+                if not isinstance(arg, dict):
+                    raise ApiError(HTTPStatus.BAD_REQUEST, "body must be a JSON object")
+            else:
+                arg = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            status, payload = handler(arg)
+        except ApiError as e:
+            status, payload = e.status, {"error": str(e)}
+        except Exception as e:  # keep the connection usable
+            self.log_error("internal error on %s: %r", self.path, e)
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"}
+        self._send(status, payload)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, verbose=False):
+    """A threading HTTP server for the API (loads the model and store up front)."""
+    get_resources()
+    get_doctor_registry(core.default_store())
+    server = ThreadingHTTPServer((host, port), MedBotHandler)
+    server.daemon_threads = True
+    server.verbose = verbose
+    return server
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, verbose=False):
+    server = make_server(host, port, verbose)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,13 +1,20 @@
-import os
-import json
-import random
-import joblib
-import pandas as pd
 import streamlit as st
-from sklearn.preprocessing import LabelEncoder
-from datetime import datetime, timedelta
-import time
+from collections import ChainMap
+from datetime import date, datetime, timedelta
 import html
+from concurrent.futures import TimeoutError as FutureTimeout
+import medbot_core as core
+from medbot_core import (
+    OPEN_SLOT, delete_appointment, get_available_slots, get_bot_response,
+    get_doctor_appointments, get_latest_patient_appointment, get_patient_appointments,
+    get_patient_visit_history, mark_appointment_completed, update_appointment_status,
+)
+from medbot_resources import get_resources
+from medbot_doctors import get_doctor_registry, normalize_username
+from medbot_search import get_patient_index
+from medbot_chat import CHAT_WINDOW, ChatTranscript
+from medbot_style import style_markup
+from medbot_nlp import respond, submit
 
 # -----------------------------
 # Page config + basic theme
@@ -95,11 +102,8 @@ CHAT_CSS = """
 @media (max-width: 800px) {
   .bot-bubble, .user-bubble { max-width: 94%; }
 }
-
-}
 </style>
 """
-st.markdown(CHAT_CSS, unsafe_allow_html=True)
 
 # Limit main content width & style a centered login card
 NARROW_CSS = """
@@ -126,7 +130,6 @@ NARROW_CSS = """
 }
 </style>
 """
-st.markdown(NARROW_CSS, unsafe_allow_html=True)
 
 
 BG_CSS = """
@@ -178,7 +181,6 @@ BG_CSS = """
 }
 </style>
 """
-st.markdown(BG_CSS, unsafe_allow_html=True)
 
 # Hide flashy decorations for simple login
 SIMPLE_LOGIN_CSS = """
@@ -194,7 +196,6 @@ SIMPLE_LOGIN_CSS = """
 }
 </style>
 """
-st.markdown(SIMPLE_LOGIN_CSS, unsafe_allow_html=True)
 
 # -----------------------------
 # Custom button colors (place AFTER your other CSS blocks)
@@ -243,37 +244,23 @@ div[data-testid="baseButton-logout_hidden"] div[role="button"]:hover,
 
 </style>
 """
-st.markdown(CUSTOM_BTN_CSS, unsafe_allow_html=True)
+
+# all of the blocks above as one minified <style> element, built once per process
+st.markdown(
+    style_markup(CHAT_CSS, NARROW_CSS, BG_CSS, SIMPLE_LOGIN_CSS, CUSTOM_BTN_CSS),
+    unsafe_allow_html=True,
+)
 
 
 # -----------------------------
 # Load model + jsons
 # -----------------------------
 try:
-    model = joblib.load("medbot_model.pkl")
-    vectorizer = joblib.load("vectorizer.pkl")
-
-    with open("intents.json", "r", encoding="utf-8") as f:
-        intents = json.load(f)
-
-    with open("doctors.json", "r", encoding="utf-8") as f:
-        doctors = json.load(f)
-
-    with open("symptoms.json", "r", encoding="utf-8") as f:
-        symptoms = json.load(f)
-
-    if os.path.exists("follow_up_questions.json"):
-        with open("follow_up_questions.json", "r", encoding="utf-8") as f:
-            follow_ups = json.load(f)
-    else:
-        follow_ups = {}
-
-    doctors_df = pd.DataFrame(doctors)
-
-    le = LabelEncoder()
-    tags = [intent['tag'] for intent in intents.get('intents', [])]
-    if tags:
-        le.fit(tags)
+    # shared, process-wide bundle (reloaded only when a source file changes)
+    _res = get_resources()
+    intents = _res.intents
+    symptoms = _res.symptoms
+    follow_ups = _res.follow_ups
 except FileNotFoundError as e:
     st.error(f"Missing file: {e}. Place your model and JSONs in the same folder.")
     st.stop()
@@ -284,302 +271,47 @@ except Exception as e:
 # -----------------------------
 # helper: normalize username
 # -----------------------------
-def _normalize_username(name: str) -> str:
-    s = "".join(ch for ch in str(name).lower() if ch.isalnum() or ch == "_")
-    return s.replace(" ", "_")
+_normalize_username = normalize_username
 
-# -----------------------------
-# build demo user store (doctors + demo users)
-# -----------------------------
-users = {
-    "admin_user": {"password": "admin_pass", "role": "Admin"},
-    "patient_user": {"password": "patient_pass", "role": "Patient"},
-}
-
-# build users from doctors_df but ensure username is a string (avoid NaN/float keys)
-for _, row in doctors_df.iterrows():
-    if isinstance(row, pd.Series):
-        raw_uname = row.get("username")
-        if pd.notna(raw_uname) and str(raw_uname).strip() != "":
-            uname = str(raw_uname).strip()
-        else:
-            uname = _normalize_username(str(row.get("name", "")))
-        users[uname] = {"password": "doctor_pass", "role": "Doctor", "display_name": row.get("name")}
-
-# keep doctor list sorted and all keys as strings
-doctor_usernames = sorted([u for u, meta in users.items() if meta.get("role") == "Doctor"], key=lambda s: str(s).lower())
-doctor_rows = [{"username": u, "name": users[u].get("display_name", u)} for u in doctor_usernames]
-
-# helper mapping display->username
-_display_to_uname = {}
-for u, meta in users.items():
-    if meta.get("role") == "Doctor":
-        disp = meta.get("display_name") or u
-        key = "".join(ch for ch in str(disp).lower() if ch.isalnum())
-        _display_to_uname[key] = u
+PATIENT_SEARCH_TOP_K = 20
+HISTORY_PAGE_SIZE = 10
+# upper bound on how long a Send waits for its classification
+INFERENCE_TIMEOUT = 10.0
+ADMIN_PAGE_SIZES = [25, 50, 100, 250]
 
 # -----------------------------
-# specialty map
+# appointment persistence (SQLite, CSVs and doctors.json imported once on first start)
 # -----------------------------
-specialty_map = {
-    "fever": "General Physician",
-    "cough": "General Physician",
-    "cold": "ENT",
-    "headache": "Neurologist",
-    "back pain": "Orthopedic",
-    "stomach pain": "Gastroenterologist",
-    "nausea": "Gastroenterologist",
-    "vomiting": "Gastroenterologist",
-    "dizziness": "Neurologist",
-    "fatigue": "General Physician",
-    "chest pain": "Cardiologist",
-    "shortness of breath": "Cardiologist",
-    "allergy": "Allergist",
-    "sore throat": "ENT",
-    "diarrhea": "Gastroenterologist",
-    "constipation": "Gastroenterologist",
-    "joint pain": "Orthopedic",
-    "muscle pain": "Orthopedic",
-    "rash": "Dermatologist",
-    "insomnia": "Psychiatrist",
-    "anxiety": "Psychiatrist",
-    "depression": "Psychiatrist",
-    "weight loss": "Endocrinologist",
-    "weight gain": "Endocrinologist",
-    "blurred vision": "Ophthalmologist",
-    "ear pain": "ENT",
-    "eye pain": "Ophthalmologist",
-    "urination problem": "Nephrologist",
-    "hair fall": "Dermatologist",
-    "memory loss": "Neurologist",
-    "heartburn": "Gastroenterologist",
-    "gas problem": "Gastroenterologist",
-    "cold hands": "General Physician",
-    "cold feet": "General Physician",
-    "sweating": "General Physician",
-    "thirst": "Endocrinologist",
-    "frequent urination": "Endocrinologist",
-    "coughing blood": "Pulmonologist",
-    "nose bleeding": "ENT",
-    "swelling": "Nephrologist",
-    "lump": "Oncologist",
-    "chest tightness": "Cardiologist",
-    "palpitations": "Cardiologist",
-    "loss of appetite": "General Physician",
-    "vomiting blood": "Gastroenterologist",
-    "confusion": "Neurologist",
-    "feeling cold": "General Physician",
-    "feeling hot": "General Physician",
-    "difficulty swallowing": "ENT",
-    "snoring": "ENT",
-    "gas trouble": "Gastroenterologist",
-    "heart attack": "Cardiologist",
-    "acid reflux": "Gastroenterologist",
-    "heart pain": "Cardiologist",
-    "skin discoloration": "Dermatologist",
-    "itching": "Dermatologist",
-    "acne": "Dermatologist",
-    "hearing loss": "ENT",
-    "ringing in ears": "ENT",
-    "tonsil pain": "ENT",
-    "child not eating": "Pediatrician",
-    "delayed milestones": "Pediatrician",
-    "bone fracture": "Orthopedic",
-    "knee stiffness": "Orthopedic",
-    "bloating": "Gastroenterologist",
-    "mood swings": "Psychiatrist",
-    "panic attacks": "Psychiatrist",
-    "chronic cough": "Pulmonologist",
-    "wheezing": "Pulmonologist",
-    "hormonal imbalance": "Endocrinologist",
-    "irregular periods": "Endocrinologist",
-    "kidney pain": "Nephrologist",
-    "foamy urine": "Nephrologist",
-    "eye redness": "Ophthalmologist",
-    "double vision": "Ophthalmologist",
-    "joint swelling": "Rheumatologist",
-    "morning stiffness": "Rheumatologist",
-    "unexplained bruising": "Oncologist",
-    "persistent fatigue": "Oncologist",
-    "seasonal sneezing": "Allergist",
-    "skin allergy": "Allergist",
-    "irregular heartbeat": "Cardiologist",
-    "chest heaviness": "Cardiologist"
-}
-
-APPT_CSV = "appointments.csv"
-HISTORY_CSV = "patient_history.csv"
+store = core.default_store()
 
 # -----------------------------
-# appointment persistence
+# doctor roster + demo user store
 # -----------------------------
-def load_appointments():
-    if os.path.exists(APPT_CSV):
-        try:
-            return pd.read_csv(APPT_CSV).to_dict("records")
-        except Exception:
-            return []
-    return []
+# process-wide; each rerun takes one consistent snapshot of the maps below
+# (the admin tab's add / edit / delete publish a new one and rerun)
+roster = get_doctor_registry(store)
+users = ChainMap({
+    "admin_user": {"password": "admin_pass", "role": "Admin"},
+    "patient_user": {"password": "patient_pass", "role": "Patient"},
+}, roster.users)
+doctor_usernames = roster.usernames  # sorted case-insensitively
+doctor_rows = roster.rows
+_display_to_uname = roster.display_to_uname
 
-def save_appointments(appts):
-    try:
-        if not appts:
-            open(APPT_CSV, "w").close()
-        else:
-            pd.DataFrame(appts).to_csv(APPT_CSV, index=False)
-        if 'appointments' in st.session_state:
-            st.session_state.appointments = appts
-    except Exception as e:
-        st.error(f"Failed to save appointments: {e}")
-
-def book_appointment(patient_id, doctor_name, doctor_username, time_slot, symptom):
-    appt = {
-        "patient": patient_id,
-        "doctor": doctor_name,
-        "doctor_username": doctor_username,
-        "time": time_slot,
-        "symptom": symptom,
-        "status": "Pending",
-        "created_at": datetime.utcnow().isoformat()
-    }
-    appts = load_appointments()
-    appts.append(appt)
-    save_appointments(appts)
-    if 'appointments' not in st.session_state:
-        st.session_state.appointments = []
-    st.session_state.appointments.append(appt)
-    return appt
-
-def get_patient_appointments(patient_id):
-    return [a for a in load_appointments() if a.get("patient") == patient_id]
-
-def get_latest_patient_appointment(patient_id):
-    appts = get_patient_appointments(patient_id)
-    if not appts:
-        return None
-    try:
-        appts_sorted = sorted(appts, key=lambda x: x.get("created_at") or "", reverse=True)
-        return appts_sorted[0]
-    except Exception:
-        return appts[-1]
-
-def get_doctor_appointments(doctor_id):
-    appts = load_appointments()
-    return [a for a in appts if a.get("doctor_username") == doctor_id]
-
-def update_appointment_status(patient, doctor_identifier, time_slot, new_status):
-    appts = load_appointments()
-    updated = False
-    for a in appts:
-        if a.get("patient") == patient and a.get("doctor_username") == doctor_identifier and a.get("time") == time_slot:
-            a["status"] = new_status
-            updated = True
-            break
-    if updated:
-        save_appointments(appts)
-    return updated
+def book_appointment(patient_id, doctor_name, doctor_username, time_slot, symptom, appt_date=None):
+    """Book a slot; returns the appointment, or None if the slot was taken meanwhile."""
+    return core.book_appointment(patient_id, doctor_name, doctor_username, time_slot, symptom, appt_date, store=store)
 
-# -----------------------------
-# patient visit history helpers
-# -----------------------------
-def get_patient_visit_history(patient_id):
-    """Return past visits for a patient (Accepted or Completed)."""
-    appts = load_appointments()
-    visits = [a for a in appts if a.get("patient") == patient_id and a.get("status") in ("Accepted", "Completed")]
-    try:
-        visits_sorted = sorted(visits, key=lambda x: x.get("created_at") or "", reverse=True)
-    except Exception:
-        visits_sorted = visits
-    return visits_sorted
-
-def mark_appointment_completed(patient, doctor_username, time_slot):
-    """Set appointment status to Completed and append to history CSV."""
-    appts = load_appointments()
-    changed = False
-    for a in appts:
-        if a.get("patient") == patient and a.get("doctor_username") == doctor_username and a.get("time") == time_slot:
-            a["status"] = "Completed"
-            changed = True
-            break
-    if changed:
-        save_appointments(appts)
-        # Append to history CSV for permanent record
-        record = {
-            "patient": patient,
-            "doctor_username": doctor_username,
-            "time": time_slot,
-            "symptom": a.get("symptom"),
-            "completed_at": datetime.utcnow().isoformat()
-        }
-        try:
-            if os.path.exists(HISTORY_CSV):
-                df = pd.read_csv(HISTORY_CSV)
-                df = pd.concat([df, pd.DataFrame([record])], ignore_index=True)
-            else:
-                df = pd.DataFrame([record])
-            df.to_csv(HISTORY_CSV, index=False)
-        except Exception:
-            pass
-    return changed
+def _slot_label(appt):
+    """'YYYY-MM-DD time' when the appointment has a date, else just the time."""
+    return " ".join(str(x) for x in (appt.get("date"), appt.get("time")) if x)
 
-# -----------------------------
-# helper functions (bot + doctor rec)
-# -----------------------------
-def find_specialty(symptom):
-    symptom_lower = str(symptom).lower().strip()
-    if symptom_lower in specialty_map:
-        return specialty_map[symptom_lower]
-    for key in specialty_map:
-        if key in symptom_lower or symptom_lower in key:
-            return specialty_map[key]
-    return "General Physician"
-
-def get_bot_response(user_input):
-    """
-    Predict intent -> return (reply_from_responses, predicted_tag_or_None, follow_ups_list_or_None)
-    Important: do NOT use follow-up text as the immediate bot reply.
-    """
-    try:
-        vec = vectorizer.transform([user_input.lower()])
-        prediction = model.predict(vec)
-        predicted_tag = le.inverse_transform(prediction)[0] if hasattr(le, "inverse_transform") else prediction[0]
-    except Exception:
-        predicted_tag = None
-
-    if predicted_tag:
-        for intent in intents.get('intents', []):
-            if intent.get('tag') == predicted_tag:
-                # reply must come from intent['responses'] only
-                resp_choices = intent.get('responses') or []
-                response = random.choice(resp_choices) if resp_choices else "Sorry, I don't understand."
-                # collect follow-ups separately (always return list or None)
-                raw_fups = None
-                if predicted_tag in follow_ups:
-                    raw_fups = follow_ups[predicted_tag]
-                else:
-                    raw_fups = intent.get('follow_up_questions')
-                # normalize follow-ups to list of non-empty strings or None
-                fups = None
-                if isinstance(raw_fups, (list, tuple)):
-                    cleaned = [str(x).strip() for x in raw_fups if str(x).strip()]
-                    fups = cleaned if cleaned else None
-                elif isinstance(raw_fups, str) and raw_fups.strip():
-                    fups = [raw_fups.strip()]
-                return response, predicted_tag, fups
-    return "Sorry, I don't understand. Please describe your symptom clearly.", None, None
+def get_bot_response_async(user_input, **kwargs):
+    """Start get_bot_response on the shared inference pool; returns a Future."""
+    return submit(get_bot_response, user_input, res=_res, **kwargs)
 
 def recommend_doctors(symptom, top_n=3):
-    specialties = find_specialty(symptom)
-    if isinstance(specialties, str):
-        specialties = [specialties]
-    filtered = doctors_df[doctors_df['specialty'].isin(specialties)]
-    sorted_docs = filtered.sort_values(by='rating', ascending=False) if not filtered.empty else doctors_df.sort_values(by='rating', ascending=False)
-    top_docs = []
-    for _, r in sorted_docs.head(top_n).iterrows():
-        slots = r.get('slots', []) if isinstance(r.get('slots', []), list) else [s.strip() for s in str(r.get('slots', "")).split(',') if s.strip()]
-        uname = r.get('username') if 'username' in r and pd.notna(r.get('username')) else _normalize_username(str(r.get('name', '')))
-        top_docs.append({"name": r.get('name'), "specialty": r.get('specialty'), "rating": r.get('rating'), "slots": slots, "username": uname})
-    return top_docs
+    return core.recommend_doctors(symptom, top_n, res=_res, store=store)
 
 # -----------------------------
 # session init
@@ -591,7 +323,7 @@ if 'role' not in st.session_state:
 if 'username' not in st.session_state:
     st.session_state.username = None
 if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = []  # list of {"user": str or None, "bot": str or None}
+    st.session_state.chat_history = ChatTranscript(CHAT_WINDOW)  # last CHAT_WINDOW {"user", "bot"} entries
 if 'current_symptom' not in st.session_state:
     st.session_state.current_symptom = None
 # follow-up state (queue + pending + answers)
@@ -605,8 +337,6 @@ if 'asking_follow_up' not in st.session_state:
     st.session_state.asking_follow_up = False
 if 'symptoms_collected' not in st.session_state:
     st.session_state.symptoms_collected = []
-if 'appointments' not in st.session_state:
-    st.session_state.appointments = load_appointments()
 # UI: patient history toggle (kept for compatibility, though now we use tabs)
 if 'show_history' not in st.session_state:
     st.session_state.show_history = False
@@ -614,27 +344,22 @@ if 'show_history' not in st.session_state:
 # -----------------------------
 # UI helpers: chat bubbles (escape input)
 # -----------------------------
-def _render_user_bubble(text):
-    if text is None:
-        return
-    safe = html.escape(str(text)).replace("\n", "<br>")
-    st.markdown(f"<div style='display:flex; justify-content:flex-end;'><div class='user-bubble'><div class='meta'>You</div>{safe}</div></div>", unsafe_allow_html=True)
-
-def _render_bot_bubble(text):
-    if text is None:
-        return
-    safe = html.escape(str(text)).replace("\n", "<br>")
-    st.markdown(f"<div style='display:flex; justify-content:flex-start;'><div class='bot-bubble'><div class='meta'>MedBot</div>{safe}</div></div>", unsafe_allow_html=True)
+def _render_transcript(transcript):
+    # bubbles are escaped/rendered once when added; one element for the whole window
+    if transcript.dropped:
+        st.markdown(f"<div class='small-muted'>{transcript.dropped} earlier messages not shown</div>", unsafe_allow_html=True)
+    if len(transcript):
+        st.markdown(transcript.html(), unsafe_allow_html=True)
 
 def _render_history_card(appt):
     # appt: dict with patient, doctor, time, created_at, status, symptom
     name = appt.get("patient")
     doctor = appt.get("doctor") or appt.get("doctor_username")
-    # created_at may be ISO timestamp; show date if possible
+    # appointment date if booked with one, else the ISO created_at timestamp's date
     created = appt.get("created_at")
-    date_str = ""
+    date_str = appt.get("date") or ""
     try:
-        if created:
+        if created and not date_str:
             dt = datetime.fromisoformat(created)
             date_str = dt.strftime("%Y-%m-%d")
     except Exception:
@@ -802,22 +527,18 @@ if st.session_state.logged_in and st.session_state.role == "Patient":
     with tab_chat:
         st.markdown("### 💬 Chat with MedBot")
         # render history (chat bubbles)
-        for chat in st.session_state.chat_history:
-            if chat.get("user"):
-                _render_user_bubble(chat["user"])
-            if chat.get("bot"):
-                _render_bot_bubble(chat["bot"])
+        _render_transcript(st.session_state.chat_history)
 
         # follow-up handling (single pending question + queue, no duplicates)
         if st.session_state.asking_follow_up and st.session_state.pending_follow_up:
             q = st.session_state.pending_follow_up
             # ensure question appears in chat history exactly once
-            if not any(chat.get("bot") == q for chat in st.session_state.chat_history):
-                st.session_state.chat_history.append({"user": None, "bot": q})
+            if not st.session_state.chat_history.has_bot(q):
+                st.session_state.chat_history.add(bot=q)
             ans = st.text_input(q, key=f"fup_{hash(q)}")
             if st.button("Answer", key=f"ans_btn_{hash(q)}") and ans.strip():
                 # save user's answer once
-                st.session_state.chat_history.append({"user": ans.strip(), "bot": None})
+                st.session_state.chat_history.add(user=ans.strip())
                 st.session_state.follow_up_answers[q] = ans.strip()
                 # move to next follow-up in queue if available
                 if st.session_state.follow_up_queue:
@@ -836,7 +557,7 @@ if st.session_state.logged_in and st.session_state.role == "Patient":
                         f"it seems you’re experiencing symptoms related to {symptom}. "
                         "Here are some doctors who can help you."
                     )
-                    st.session_state.chat_history.append({"user": None, "bot": bot_msg})
+                    st.session_state.chat_history.add(bot=bot_msg)
                     st.session_state.symptoms_collected.append(symptom)
                     # clear follow-up buffers (keep history)
                     st.session_state.follow_up_queue = []
@@ -851,9 +572,13 @@ if st.session_state.logged_in and st.session_state.role == "Patient":
                     key="symptom_input",
                 )
                 if st.button("Send", key="send_symptom") and user_input.strip():
+                    pending = get_bot_response_async(user_input)
                     with st.spinner("MedBot is thinking..."):
-                        time.sleep(0.5)
-                        bot_resp, predicted_tag, fups = get_bot_response(user_input)
+                        try:
+                            bot_resp, predicted_tag, fups = pending.result(timeout=INFERENCE_TIMEOUT)
+                        except FutureTimeout:
+                            pending.cancel()
+                            bot_resp, predicted_tag, fups = respond(None, _res)
 
                     # avoid follow-up text duplication
                     if fups and any(
@@ -864,9 +589,7 @@ if st.session_state.logged_in and st.session_state.role == "Patient":
                         )
 
                     # append user message and the immediate bot response
-                    st.session_state.chat_history.append(
-                        {"user": user_input.strip(), "bot": bot_resp}
-                    )
+                    st.session_state.chat_history.add(user=user_input.strip(), bot=bot_resp)
                     st.session_state.current_symptom = predicted_tag or user_input.strip()
 
                     # if follow-ups exist, initialize queue and show first question
@@ -883,13 +606,8 @@ if st.session_state.logged_in and st.session_state.role == "Patient":
                         st.session_state.follow_up_answers = {}
                         # append first follow-up once
                         first_q = st.session_state.pending_follow_up
-                        if first_q and not any(
-                            chat.get("bot") == first_q
-                            for chat in st.session_state.chat_history
-                        ):
-                            st.session_state.chat_history.append(
-                                {"user": None, "bot": first_q}
-                            )
+                        if first_q and not st.session_state.chat_history.has_bot(first_q):
+                            st.session_state.chat_history.add(bot=first_q)
                     else:
                         # no follow-ups: finalize immediately and show doctors
                         symptom = st.session_state.current_symptom
@@ -899,9 +617,7 @@ if st.session_state.logged_in and st.session_state.role == "Patient":
                             f"it seems you’re experiencing symptoms related to {symptom}. "
                             "Here are some doctors who can help you."
                         )
-                        st.session_state.chat_history.append(
-                            {"user": None, "bot": bot_msg}
-                        )
+                        st.session_state.chat_history.add(bot=bot_msg)
                         st.session_state.symptoms_collected.append(symptom)
                     st.rerun()
             else:
@@ -920,41 +636,59 @@ if st.session_state.logged_in and st.session_state.role == "Patient":
                         key="doc_select",
                     )
                     selected_doc = top_docs[labels.index(choice)]
+                    appt_date = st.date_input(
+                        "Choose date",
+                        value=date.today(),
+                        min_value=date.today(),
+                        key="date_select",
+                    )
+                    doctor_display = selected_doc.get("name") or selected_doc.get(
+                        "username"
+                    )
+                    doctor_username = selected_doc.get("username") or _normalize_username(
+                        doctor_display
+                    )
+                    # only offer slots nobody has booked with this doctor on that date
+                    free_slots = (
+                        get_available_slots(doctor_username, selected_doc["slots"], appt_date)
+                        if selected_doc["slots"]
+                        else [OPEN_SLOT]
+                    )
+                    if not free_slots:
+                        st.info("No free slots left with this doctor on that date — pick another date or doctor.")
                     slot = st.selectbox(
                         "Choose available slot",
-                        selected_doc["slots"] if selected_doc["slots"] else ["Any time"],
+                        free_slots,
                         key="slot_select",
                     )
-                    if st.button("Book Appointment", key="book_btn"):
-                        doctor_display = selected_doc.get("name") or selected_doc.get(
-                            "username"
-                        )
-                        doctor_username = selected_doc.get("username") or _normalize_username(
-                            doctor_display
-                        )
+                    if st.button("Book Appointment", key="book_btn", disabled=not free_slots):
                         appt = book_appointment(
                             st.session_state.username,
                             doctor_display,
                             doctor_username,
                             slot,
                             symptom,
+                            appt_date,
                         )
-                        st.success(
-                            f"Appointment requested with **{doctor_display}** at **{slot}**. Status: {appt['status']}"
-                        )
-                        st.session_state.current_symptom = None
-                        st.session_state.symptoms_collected = []
-                        st.session_state.follow_up_queue = []
-                        st.session_state.pending_follow_up = None
-                        st.session_state.follow_up_answers = {}
-                        st.session_state.asking_follow_up = False
-                        st.rerun()
+                        if appt is None:
+                            st.error("Sorry, that slot was just booked by someone else. Please choose another one.")
+                        else:
+                            st.success(
+                                f"Appointment requested with **{doctor_display}** on **{appt['date']}** at **{slot}**. Status: {appt['status']}"
+                            )
+                            st.session_state.current_symptom = None
+                            st.session_state.symptoms_collected = []
+                            st.session_state.follow_up_queue = []
+                            st.session_state.pending_follow_up = None
+                            st.session_state.follow_up_answers = {}
+                            st.session_state.asking_follow_up = False
+                            st.rerun()
                 else:
                     st.write("No doctors found for that symptom — try rephrasing.")
 
         # Clear chat button only in Chat tab
         if st.button("Clear Chat", key="clear_chat_main"):
-            st.session_state.chat_history = []
+            st.session_state.chat_history.clear()
             st.session_state.current_symptom = None
             st.session_state.asking_follow_up = False
             st.session_state.follow_up_queue = []
@@ -985,7 +719,7 @@ if st.session_state.logged_in and st.session_state.role == "Patient":
             )
             st.markdown(
                 f"**Doctor:** {last.get('doctor') or last.get('doctor_username')}  \n"
-                f"**Time:** {last.get('time')}  \n"
+                f"**Time:** {_slot_label(last)}  \n"
                 f"**Symptom:** {last.get('symptom')}"
             )
         else:
@@ -996,7 +730,7 @@ if st.session_state.logged_in and st.session_state.role == "Patient":
         st.markdown("#### All Appointment Requests")
         all_appts = get_patient_appointments(st.session_state.username)
         if all_appts:
-            for a in sorted(all_appts, key=lambda x: x.get("created_at") or "", reverse=True):
+            for a in all_appts:
                 _render_history_card(a)
         else:
             st.write("No appointments found.")
@@ -1034,10 +768,8 @@ elif st.session_state.logged_in and st.session_state.role == "Doctor":
 
     # determine display name (reuse your existing logic)
     display_name = users.get(doc_uname, {}).get("display_name")
-    if not display_name and 'username' in doctors_df.columns:
-        row = doctors_df.loc[doctors_df['username'] == doc_uname]
-        if not row.empty:
-            display_name = row.iloc[0].get('name')
+    if not display_name:
+        display_name = (roster.get(doc_uname) or {}).get("name")
     display_name = display_name or doc_uname
 
     st.markdown(f"**Welcome, {html.escape(str(display_name))}!**")
@@ -1054,8 +786,7 @@ elif st.session_state.logged_in and st.session_state.role == "Doctor":
         if not appts:
             st.markdown("<div class='small-muted'>You have no appointments yet.</div>", unsafe_allow_html=True)
         else:
-            visible_appts = sorted(appts, key=lambda x: x.get("created_at") or "", reverse=True)
-            for i, a in enumerate(visible_appts):
+            for a in appts:
                 status = a.get("status", "Pending")
                 pill_class = "status-pending"
                 emoji = "⚪"
@@ -1067,31 +798,31 @@ elif st.session_state.logged_in and st.session_state.role == "Doctor":
                     pill_class = "status-accepted"; emoji = "✔️"
 
                 st.markdown("<div class='app-card' style='margin-bottom:10px'>", unsafe_allow_html=True)
-                st.markdown(f"**Patient:** {html.escape(str(a.get('patient') or ''))}  \n**Time:** {html.escape(str(a.get('time') or ''))}  \n**Reason:** {html.escape(str(a.get('symptom') or ''))}")
+                st.markdown(f"**Patient:** {html.escape(str(a.get('patient') or ''))}  \n**Time:** {html.escape(_slot_label(a))}  \n**Reason:** {html.escape(str(a.get('symptom') or ''))}")
                 st.markdown(f"<div class='small-muted'>Created: {html.escape(str(a.get('created_at') or ''))}</div>", unsafe_allow_html=True)
                 st.markdown(f"<div class='status-pill {pill_class}' style='margin-top:8px'>{emoji} {html.escape(str(status))}</div>", unsafe_allow_html=True)
 
                 c1, c2, c3 = st.columns([1,1,1])
                 with c1:
                     if status == "Pending":
-                        if st.button("Accept", key=f"accept_{doc_uname}_{i}_{a.get('patient')}_{a.get('time')}"):
-                            ok = update_appointment_status(a.get('patient'), doc_uname, a.get('time'), "Accepted")
+                        if st.button("Accept", key=f"accept_{a.get('id')}"):
+                            ok = update_appointment_status(a.get('id'), "Accepted")
                             if ok:
                                 st.rerun()
                             else:
                                 st.error("Failed to update appointment.")
                 with c2:
                     if status == "Pending":
-                        if st.button("Reject", key=f"reject_{doc_uname}_{i}_{a.get('patient')}_{a.get('time')}"):
-                            ok = update_appointment_status(a.get('patient'), doc_uname, a.get('time'), "Rejected")
+                        if st.button("Reject", key=f"reject_{a.get('id')}"):
+                            ok = update_appointment_status(a.get('id'), "Rejected")
                             if ok:
                                 st.rerun()
                             else:
                                 st.error("Failed to update appointment.")
                 with c3:
                     if status in ("Accepted",):
-                        if st.button("Mark as Completed", key=f"complete_{doc_uname}_{i}_{a.get('patient')}_{a.get('time')}"):
-                            ok = mark_appointment_completed(a.get('patient'), doc_uname, a.get('time'))
+                        if st.button("Mark as Completed", key=f"complete_{a.get('id')}"):
+                            ok = mark_appointment_completed(a.get('id'))
                             if ok:
                                 st.rerun()
                             else:
@@ -1108,37 +839,29 @@ elif st.session_state.logged_in and st.session_state.role == "Doctor":
 
         def _display_patient_history(patient_name):
             st.markdown(f"#### History for: {html.escape(str(patient_name))}")
-            all_appts = load_appointments()
-
-            # past accepted/completed appointments for this patient
-            past = [a for a in all_appts 
-        if a.get("patient") == patient_name 
-        and a.get("doctor_username") == doc_uname
-        and a.get("status") in ("Accepted", "Completed")]
-
-
-            # rows from HISTORY_CSV
-            hist_rows = []
+            # accepted/completed appointments + history rows, merged and ordered by the store
             try:
-                if os.path.exists(HISTORY_CSV):
-                    hist_df = pd.read_csv(HISTORY_CSV)
-                    if not hist_df.empty and 'patient' in hist_df.columns:
-                        # ensure patient column is treated as string
-                        hist_rows = hist_df[
-    (hist_df['patient'].astype(str) == str(patient_name)) &
-    (hist_df['doctor_username'].astype(str) == str(doc_uname))
-].to_dict("records")
-
+                total = store.timeline_count(patient_name, doc_uname)
             except Exception:
-                hist_rows = []
+                total = 0
 
-            # Combine and sort by created_at/completed_at descending
-            combined = sorted(past + hist_rows, key=lambda x: x.get("created_at") or x.get("completed_at") or "", reverse=True)
-
-            if not combined:
+            if not total:
                 st.write("No recorded visits found for this patient.")
                 return
 
+            pages = (total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+            page = 1
+            if pages > 1:
+                page = int(st.number_input(
+                    f"Page (of {pages}, {total} visits)",
+                    min_value=1, max_value=pages, value=1, step=1,
+                    key=f"doctor_history_page_{patient_name}",
+                ))
+            try:
+                combined = store.timeline(patient_name, doc_uname, limit=HISTORY_PAGE_SIZE, offset=(page - 1) * HISTORY_PAGE_SIZE)
+            except Exception:
+                combined = []
+
             for rec in combined:
                 date_str = rec.get("created_at") or rec.get("completed_at") or ""
                 try:
@@ -1152,50 +875,29 @@ elif st.session_state.logged_in and st.session_state.role == "Doctor":
                 status = rec.get("status") or ("Completed" if rec.get("completed_at") else "")
                 st.markdown(f"- **Date:** {html.escape(str(date_str))}  \n  **Doctor:** {html.escape(str(doctor_name))}  \n  **Reason:** {html.escape(str(symptom))}  \n  **Status:** {html.escape(str(status))}")
 
-        search_query = st.text_input("Enter patient name or username (partial match)", key="doctor_history_search")
-        if st.button("Search", key="doctor_history_search_btn"):
-            q = (search_query or "").strip()
-            if not q:
-                st.info("Please enter a patient name or username to search.")
-            else:
-                # Build candidates with normalization map
-                all_appts = load_appointments()
-                candidates_raw = [a.get("patient") for a in all_appts if a.get("patient")]
-                candidates = set([str(p).strip() for p in candidates_raw if p is not None])
-
-                # include patients from HISTORY_CSV
-                try:
-                    if os.path.exists(HISTORY_CSV):
-                        hist_df = pd.read_csv(HISTORY_CSV)
-                        if not hist_df.empty and 'patient' in hist_df.columns:
-                            candidates |= set(hist_df['patient'].dropna().astype(str).str.strip().tolist())
-                except Exception:
-                    pass
+        search_query = st.text_input(
+            "Enter patient name or username (partial match)",
+            key="doctor_history_search",
+            placeholder="Start typing a patient name…",
+        )
+        q = (search_query or "").strip()
+        if q:
+            # ranked top-k from the incremental index (synced with new rows on each call)
+            try:
+                matches = get_patient_index(store).search(q, k=PATIENT_SEARCH_TOP_K)
+            except Exception:
+                matches = []
 
-                # normalize -> map normalized -> set(originals)
-                norm_map = {}
-                for orig in candidates:
-                    norm = orig.strip().lower()
-                    norm_map.setdefault(norm, set()).add(orig)
-
-                # find matches: any normalized candidate where query is substring
-                q_norm = q.lower()
-                matched_originals = set()
-                for norm, originals in norm_map.items():
-                    if q_norm in norm:
-                        matched_originals.update(originals)
-
-                matches = sorted(list(matched_originals), key=lambda s: str(s).lower())
-
-                if not matches:
-                    st.info("No patients found matching that query.")
-                elif len(matches) > 1:
-                    pick = st.selectbox("Multiple matches — pick a patient", matches, key="doctor_history_pick")
-                    if st.button("Show History", key="doctor_history_pick_btn"):
-                        _display_patient_history(pick)
-                else:
-                    target = matches[0]
-                    _display_patient_history(target)
+            if not matches:
+                st.info("No patients found matching that query.")
+            elif len(matches) > 1:
+                pick = st.selectbox("Multiple matches — pick a patient", matches, key="doctor_history_pick")
+                _display_patient_history(pick)
+            else:
+                target = matches[0]
+                _display_patient_history(target)
+        else:
+            st.info("Please enter a patient name or username to search.")
 
         st.markdown("</div>", unsafe_allow_html=True)
 
@@ -1213,7 +915,7 @@ elif st.session_state.logged_in and st.session_state.role == "Admin":
     .stDataFrame div[data-testid="stTable"] table, .stTable table { width: 100% !important; table-layout: auto; }
     </style>
     """
-    st.markdown(ADMIN_WIDE_CSS, unsafe_allow_html=True)
+    st.markdown(style_markup(ADMIN_WIDE_CSS), unsafe_allow_html=True)
 
     st.subheader("Admin Dashboard")
 
@@ -1223,17 +925,59 @@ elif st.session_state.logged_in and st.session_state.role == "Admin":
     with tab_admin_appts:
         st.markdown("<div class='app-card'>", unsafe_allow_html=True)
         st.markdown("### 📋 All Appointments")
-        all_appts = load_appointments()
+
+        # filters / sorting / paging are all applied by the store, one page per rerun
+        f1, f2, f3 = st.columns([2, 2, 2])
+        with f1:
+            flt_status = st.multiselect("Status", ["Pending", "Accepted", "Rejected", "Completed"], key="admin_flt_status")
+            flt_patient = st.text_input("Patient (starts with)", key="admin_flt_patient")
+        with f2:
+            flt_doctor = st.selectbox("Doctor", ["All"] + doctor_usernames, key="admin_flt_doctor")
+            sort_labels = {"Created": "created_at", "Date": "date", "Patient": "patient", "Doctor": "doctor_username", "Status": "status"}
+            sort_by = st.selectbox("Sort by", list(sort_labels), key="admin_sort_by")
+        with f3:
+            flt_from = st.date_input("Created from", value=None, key="admin_flt_from")
+            flt_to = st.date_input("Created to", value=None, key="admin_flt_to")
+        p1, p2, p3 = st.columns([2, 2, 2])
+        with p1:
+            sort_desc = st.toggle("Newest / Z→A first", value=True, key="admin_sort_desc")
+        with p2:
+            page_size = st.selectbox("Rows per page", ADMIN_PAGE_SIZES, key="admin_page_size")
+
+        filters = {
+            "statuses": flt_status or None,
+            "doctor_username": None if flt_doctor == "All" else flt_doctor,
+            "patient_prefix": flt_patient.strip() or None,
+            "created_from": flt_from.isoformat() if flt_from else None,
+            "created_before": (flt_to + timedelta(days=1)).isoformat() if flt_to else None,
+        }
+        try:
+            total = store.count(**filters)
+        except Exception:
+            total = 0
+        pages = max(1, (total + page_size - 1) // page_size)
+        with p3:
+            page = int(st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1, key="admin_page"))
+        try:
+            all_appts = store.page(
+                limit=page_size, offset=(page - 1) * page_size,
+                sort=sort_labels[sort_by], descending=sort_desc, **filters,
+            )
+        except Exception:
+            all_appts = []
+        st.caption(f"{total} matching appointments")
+
         if all_appts:
-            df = pd.DataFrame(all_appts)
-            st.dataframe(df, use_container_width=True)
+            st.dataframe(all_appts, use_container_width=True)
 
             st.markdown("### Manage appointment")
-            options = [f"{i}: {r.get('patient')} | {r.get('doctor') or r.get('doctor_username')} | {r.get('time')} | {r.get('status')}" for i, r in enumerate(all_appts)]
-            sel = st.selectbox("Select appointment", ["Select"] + options, index=0)
+            # options carry the appointment id, not the row position, so a
+            # concurrent write can never redirect an action to another row
+            options = [f"#{r.get('id')}: {r.get('patient')} | {r.get('doctor') or r.get('doctor_username')} | {_slot_label(r)} | {r.get('status')}" for r in all_appts]
+            sel = st.selectbox("Select appointment (current page)", ["Select"] + options, index=0)
             if sel and sel != "Select":
-                idx = int(sel.split(":", 1)[0])
-                row = all_appts[idx]
+                idx = int(sel.split(":", 1)[0].lstrip("#"))
+                row = store.get(idx) or {}
                 st.markdown(f"**Selected:** {row.get('patient')} — {row.get('doctor') or row.get('doctor_username')} — {row.get('time')} — {row.get('status')}")
                 col_a, col_b, col_c = st.columns([1,1,1])
 
@@ -1249,7 +993,7 @@ elif st.session_state.logged_in and st.session_state.role == "Admin":
                 with col_a:
                     new_status = st.selectbox("New status", status_list, index=default_index)
                     if st.button("Update status", key=f"admin_update_{idx}"):
-                        ok = update_appointment_status(row.get('patient'), row.get('doctor_username') or row.get('doctor'), row.get('time'), new_status)
+                        ok = update_appointment_status(idx, new_status)
                         if ok:
                             st.success("Updated.")
                             st.rerun()
@@ -1257,37 +1001,51 @@ elif st.session_state.logged_in and st.session_state.role == "Admin":
                             st.error("Failed to update.")
                 with col_b:
                     if st.button("Delete selected appointment", key=f"admin_delete_{idx}"):
-                        appts = load_appointments()
-                        try:
-                            appts.pop(idx)
-                            save_appointments(appts)
+                        if delete_appointment(idx):
                             st.success("Deleted appointment.")
                             st.rerun()
-                        except Exception as e:
-                            st.error(f"Failed to delete: {e}")
+                        else:
+                            st.error("Failed to delete: appointment no longer exists.")
                 with col_c:
                     days_cut = st.number_input("Delete if older than (days)", min_value=0, value=0, step=1, key="admin_delete_if_days")
                     if st.button("Delete if older", key=f"admin_delete_if_{idx}"):
-                        created = row.get("created_at")
-                        removed = False
-                        if created:
-                            try:
-                                dt = datetime.fromisoformat(created)
-                                cutoff = datetime.utcnow() - timedelta(days=int(days_cut))
-                                if dt < cutoff:
-                                    appts = load_appointments()
-                                    appts.pop(idx)
-                                    save_appointments(appts)
-                                    st.success("Deleted appointment (older than cutoff).")
-                                    removed = True
-                            except Exception:
-                                st.error("Cannot parse appointment date; aborted.")
+                        cutoff = (datetime.utcnow() - timedelta(days=int(days_cut))).isoformat()
+                        removed = delete_appointment(idx, created_before=cutoff)
+                        if removed:
+                            st.success("Deleted appointment (older than cutoff).")
                         if not removed and days_cut == 0:
                             st.info("No deletion: appointment not older than cutoff.")
                         if removed:
                             st.rerun()
         else:
-            st.write("No appointments recorded.")
+            st.write("No appointments match these filters.")
+
+        # retention: move everything older than N days (and/or in the chosen
+        # statuses) to appointments_archive in one transaction
+        with st.expander("🗄 Archive old appointments"):
+            r1, r2 = st.columns([1, 2])
+            with r1:
+                purge_days = st.number_input("Older than (days)", min_value=0, value=90, step=1, key="admin_purge_days")
+            with r2:
+                purge_statuses = st.multiselect("Only these statuses (optional)", ["Pending", "Accepted", "Rejected", "Completed"], key="admin_purge_statuses")
+            purge_cutoff = (datetime.utcnow() - timedelta(days=int(purge_days))).isoformat() if purge_days else None
+            if purge_cutoff or purge_statuses:
+                try:
+                    due = store.count(created_before=purge_cutoff, statuses=purge_statuses or None)
+                except Exception:
+                    due = 0
+                st.caption(f"{due} appointments would be archived")
+                if st.button("Archive now", key="admin_purge_btn"):
+                    try:
+                        st.session_state.admin_purge_result = store.archive(created_before=purge_cutoff, statuses=purge_statuses or None)
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Archive failed: {e}")
+            else:
+                st.caption("Choose a cutoff or at least one status.")
+            if st.session_state.get("admin_purge_result"):
+                moved, secs = st.session_state.admin_purge_result
+                st.success(f"Archived {moved} appointments in {secs:.3f}s.")
         st.markdown("</div>", unsafe_allow_html=True)
 
     # -------- TAB 2: Doctors --------
@@ -1295,7 +1053,9 @@ elif st.session_state.logged_in and st.session_state.role == "Admin":
         st.markdown("<div class='app-card'>", unsafe_allow_html=True)
         st.markdown("### ➕ Add / ✏️ Edit / 🗑 Delete doctor")
 
-        doc_opts = ["Add new doctor"] + [f"{i}: {d.get('name')} ({d.get('username') or _normalize_username(d.get('name',''))})" for i, d in enumerate(doctors)]
+        # options carry the username (the roster key); each handler below
+        # persists one row and patches the shared roster maps in place
+        doc_opts = ["Add new doctor"] + [f"{r['username']}: {r['name']}" for r in doctor_rows]
         sel_doc = st.selectbox("Choose action / doctor", doc_opts, index=0, key="admin_doc_action")
 
         if sel_doc == "Add new doctor":
@@ -1313,32 +1073,23 @@ elif st.session_state.logged_in and st.session_state.role == "Admin":
                     uname = d_username.strip() or _normalize_username(d_name)
                     new_doc = {"name": d_name.strip(), "specialty": d_specialty.strip(), "rating": float(d_rating), "slots": [s.strip() for s in d_slots.split(",") if s.strip()], "username": uname}
                     try:
-                        doctors.append(new_doc)
-                        with open("doctors.json", "w", encoding="utf-8") as f:
-                            json.dump(doctors, f, ensure_ascii=False, indent=2)
-                        doctors_df = pd.DataFrame(doctors)
-                        users[uname] = {"password": "doctor_pass", "role": "Doctor", "display_name": d_name.strip()}
-                        # refresh helpers
-                        doctor_usernames = sorted([u for u, meta in users.items() if meta.get("role") == "Doctor"], key=lambda s: str(s).lower())
-                        doctor_rows = [{"username": u, "name": users[u].get("display_name", u)} for u in doctor_usernames]
-                        _display_to_uname.clear()
-                        for u in doctor_usernames:
-                            disp = users[u].get("display_name", u)
-                            _display_to_uname["".join(ch for ch in str(disp).lower() if ch.isalnum())] = u
+                        roster.add(new_doc)
                         st.success(f"Doctor {d_name} added (username: {uname}).")
                         st.rerun()
                     except Exception as e:
                         st.error(f"Failed to add doctor: {e}")
         else:
-            idx = int(sel_doc.split(":", 1)[0])
-            doc = doctors[idx]
-            cur_name = doc.get("name", "")
-            cur_spec = doc.get("specialty", "")
-            cur_rating = float(doc.get("rating", 4.5)) if doc.get("rating") is not None else 4.5
-            cur_slots = ", ".join(doc.get("slots", [])) if isinstance(doc.get("slots", []), list) else str(doc.get("slots", ""))
-            cur_uname = doc.get("username") or _normalize_username(cur_name)
-
-            with st.form(f"admin_edit_doc_{idx}", clear_on_submit=False):
+            cur_uname = sel_doc.split(":", 1)[0]
+            doc = roster.get(cur_uname) or {"username": cur_uname, "slots": []}
+            cur_name = doc.get("name") or ""
+            cur_spec = doc.get("specialty") or ""
+            try:
+                cur_rating = float(doc.get("rating"))
+            except (TypeError, ValueError):
+                cur_rating = 4.5
+            cur_slots = ", ".join(doc.get("slots", []))
+
+            with st.form(f"admin_edit_doc_{cur_uname}", clear_on_submit=False):
                 e_name = st.text_input("Name", value=cur_name)
                 e_specialty = st.text_input("Specialty", value=cur_spec)
                 e_rating = st.number_input("Rating", min_value=0.0, max_value=5.0, value=cur_rating, step=0.1)
@@ -1348,44 +1099,21 @@ elif st.session_state.logged_in and st.session_state.role == "Admin":
                 delete_doc = st.form_submit_button("Delete this doctor")
             if save_edit:
                 try:
-                    doctors[idx]["name"] = e_name.strip()
-                    doctors[idx]["specialty"] = e_specialty.strip()
-                    doctors[idx]["rating"] = float(e_rating)
-                    doctors[idx]["slots"] = [s.strip() for s in e_slots.split(",") if s.strip()]
-                    doctors[idx]["username"] = e_username.strip() or _normalize_username(e_name)
-                    with open("doctors.json", "w", encoding="utf-8") as f:
-                        json.dump(doctors, f, ensure_ascii=False, indent=2)
-                    users[e_username.strip()] = {"password": users.get(cur_uname, {}).get("password", "doctor_pass"), "role": "Doctor", "display_name": e_name.strip()}
-                    if cur_uname != e_username.strip():
-                        users.pop(cur_uname, None)
-                    doctors_df = pd.DataFrame(doctors)
-                    doctor_usernames = sorted([u for u, meta in users.items() if meta.get("role") == "Doctor"], key=lambda s: str(s).lower())
-                    doctor_rows = [{"username": u, "name": users[u].get("display_name", u)} for u in doctor_usernames]
-                    _display_to_uname.clear()
-                    for u in doctor_usernames:
-                        disp = users[u].get("display_name", u)
-                        _display_to_uname["".join(ch for ch in str(disp).lower() if ch.isalnum())] = u
+                    roster.update(cur_uname, {
+                        "name": e_name.strip(),
+                        "specialty": e_specialty.strip(),
+                        "rating": float(e_rating),
+                        "slots": [s.strip() for s in e_slots.split(",") if s.strip()],
+                        "username": e_username.strip() or _normalize_username(e_name),
+                    })
                     st.success("Doctor updated.")
                     st.rerun()
                 except Exception as e:
                     st.error(f"Failed to save changes: {e}")
             if delete_doc:
                 try:
-                    removed = doctors.pop(idx)
-                    with open("doctors.json", "w", encoding="utf-8") as f:
-                        json.dump(doctors, f, ensure_ascii=False, indent=2)
-                    users.pop(cur_uname, None)
-                    appts = load_appointments()
-                    kept = [a for a in appts if a.get("doctor_username") != cur_uname]
-                    save_appointments(kept)
-                    doctors_df = pd.DataFrame(doctors)
-                    doctor_usernames = sorted([u for u, meta in users.items() if meta.get("role") == "Doctor"], key=lambda s: str(s).lower())
-                    doctor_rows = [{"username": u, "name": users[u].get("display_name", u)} for u in doctor_usernames]
-                    _display_to_uname.clear()
-                    for u in doctor_usernames:
-                        disp = users[u].get("display_name", u)
-                        _display_to_uname["".join(ch for ch in str(disp).lower() if ch.isalnum())] = u
-                    st.success(f"Deleted doctor {removed.get('name')} and related appointments.")
+                    roster.remove(cur_uname)
+                    st.success(f"Deleted doctor {cur_name} and related appointments.")
                     st.rerun()
                 except Exception as e:
                     st.error(f"Failed to delete doctor: {e}")
@@ -1395,8 +1123,8 @@ elif st.session_state.logged_in and st.session_state.role == "Admin":
         # Doctors overview
         st.markdown("<div class='app-card'>", unsafe_allow_html=True)
         st.markdown("### 👨‍⚕ All Doctors Overview")
-        if not doctors_df.empty:
-            st.dataframe(doctors_df, use_container_width=True)
+        if len(roster):
+            st.dataframe(roster.records(), use_container_width=True)
         else:
             st.write("No doctors data available.")
         st.markdown("</div>", unsafe_allow_html=True)
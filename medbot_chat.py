@@ -0,0 +1,74 @@
+"""Bounded chat transcript for the patient chat tab.
+
+Each message is escaped and turned into its bubble HTML once, when it is
+added, and only the last ``window`` messages are kept.  A rerun therefore
+costs the same however long the conversation has been, and "has this
+question been asked already?" is a counter lookup instead of a scan.
+"""
+import html
+from collections import Counter, deque
+
+# chat messages kept (and re-rendered on each rerun) per session
+CHAT_WINDOW = 200
+
+_USER_BUBBLE = "<div style='display:flex; justify-content:flex-end;'><div class='user-bubble'><div class='meta'>You</div>{}</div></div>"
+_BOT_BUBBLE = "<div style='display:flex; justify-content:flex-start;'><div class='bot-bubble'><div class='meta'>MedBot</div>{}</div></div>"
+
+
+def _escape(text):
+    return html.escape(str(text)).replace("\n", "<br>")
+
+
+def bubble_html(user=None, bot=None):
+    """Markup for one transcript entry (user bubble first, then the bot's)."""
+    parts = []
+    if user:
+        parts.append(_USER_BUBBLE.format(_escape(user)))
+    if bot:
+        parts.append(_BOT_BUBBLE.format(_escape(bot)))
+    return "".join(parts)
+
+
+class ChatTranscript:
+    """The last ``window`` chat entries, each with its pre-rendered HTML."""
+
+    def __init__(self, window=CHAT_WINDOW):
+        self._entries = deque(maxlen=window)   # (user, bot, html)
+        self._bot_seen = Counter()             # bot messages currently in the window
+        self._html = None
+        self.dropped = 0                       # entries pushed out of the window
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return ({"user": user, "bot": bot} for user, bot, _ in self._entries)
+
+    def add(self, user=None, bot=None):
+        if len(self._entries) == self._entries.maxlen:
+            _, old_bot, _ = self._entries[0]
+            if old_bot:
+                self._bot_seen[old_bot] -= 1
+                if not self._bot_seen[old_bot]:
+                    del self._bot_seen[old_bot]
+            self.dropped += 1
+        self._entries.append((user, bot, bubble_html(user, bot)))
+        if bot:
+            self._bot_seen[bot] += 1
+        self._html = None
+
+    def has_bot(self, text):
+        """True if MedBot already said ``text`` within the window."""
+        return text in self._bot_seen
+
+    def html(self):
+        """The whole window as one HTML string (joined once per change)."""
+        if self._html is None:
+            self._html = "".join(h for _, _, h in self._entries)
+        return self._html
+
+    def clear(self):
+        self._entries.clear()
+        self._bot_seen.clear()
+        self._html = None
+        self.dropped = 0
@@ -0,0 +1,130 @@
+"""Command-line entry points for MedBot maintenance and batch jobs.
+
+    python medbot_cli.py classify messages.txt > triage.jsonl
+    python medbot_cli.py compact
+    python medbot_cli.py export-model
+    python medbot_cli.py purge --older-than-days 365
+    python medbot_cli.py serve --port 8000
+"""
+import sys
+import json
+import time
+import argparse
+
+
+def _cmd_classify(args):
+    from medbot_nlp import classify_stream
+
+    src = open(args.input, "r", encoding="utf-8") if args.input != "-" else sys.stdin
+    started = time.perf_counter()
+    count = 0
+    try:
+        messages = (line.strip() for line in src)
+        stream = classify_stream(
+            (m for m in messages if m),
+            chunk_size=args.chunk_size,
+            top_k=args.top_k,
+            min_confidence=args.min_confidence,
+        )
+        for rec in stream:
+            sys.stdout.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            count += 1
+    finally:
+        if src is not sys.stdin:
+            src.close()
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed else 0.0
+    print(f"classified {count} messages in {elapsed:.3f}s ({rate:.0f} msg/s)", file=sys.stderr)
+    return 0
+
+
+def _cmd_compact(args):
+    from medbot_store import get_store
+
+    busy, wal_pages, done = get_store(args.db).compact()
+    print(f"checkpointed {done}/{wal_pages} WAL pages" + (" (partial: database busy)" if busy else ""))
+    return 0
+
+
+def _cmd_purge(args):
+    from datetime import datetime, timedelta
+    from medbot_store import get_store
+
+    cutoff = None
+    if args.older_than_days is not None:
+        cutoff = (datetime.utcnow() - timedelta(days=args.older_than_days)).isoformat()
+    if cutoff is None and not args.status:
+        print("purge: give --older-than-days and/or --status", file=sys.stderr)
+        return 2
+    store = get_store(args.db)
+    if args.dry_run:
+        print(f"would archive {store.count(created_before=cutoff, statuses=args.status)} appointments")
+        return 0
+    moved, elapsed = store.archive(created_before=cutoff, statuses=args.status)
+    print(f"archived {moved} appointments in {elapsed:.3f}s")
+    return 0
+
+
+def _cmd_export_model(args):
+    from medbot_model import export_model, load_compact_model
+    from medbot_resources import MODEL_PATH, VECTORIZER_PATH, load_resources
+
+    res = load_resources()
+    classes = res.model.classes_
+    tags = res.le.inverse_transform(classes) if hasattr(res.le, "classes_") else classes
+    started = time.perf_counter()
+    manifest = export_model(res.model, res.vectorizer, tags, args.out, sources=(MODEL_PATH, VECTORIZER_PATH))
+    elapsed = time.perf_counter() - started
+    print(f"exported {manifest['n_classes']} classes x {manifest['n_features']} features to {args.out}/ in {elapsed:.3f}s")
+    started = time.perf_counter()
+    load_compact_model(args.out)
+    print(f"memory-mapped load: {(time.perf_counter() - started) * 1000:.2f} ms")
+    return 0
+
+
+def _cmd_serve(args):
+    from medbot_api import serve
+
+    print(f"MedBot API listening on http://{args.host}:{args.port}", file=sys.stderr)
+    serve(args.host, args.port, verbose=args.verbose)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="medbot_cli", description="MedBot batch and maintenance commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("classify", help="triage messages (one per line) and print JSON lines")
+    p.add_argument("input", nargs="?", default="-", help="text file with one message per line ('-' for stdin)")
+    p.add_argument("--chunk-size", type=int, default=1000, help="messages vectorized per model call")
+    p.add_argument("--top-k", type=int, default=None, help="also report the k most likely tags with probabilities")
+    p.add_argument("--min-confidence", type=float, default=0.0, help="treat predictions below this probability as not understood")
+    p.set_defaults(func=_cmd_classify)
+
+    p = sub.add_parser("compact", help="checkpoint the appointment/history database's write-ahead log")
+    p.add_argument("--db", default="medbot.db", help="database file (default: medbot.db)")
+    p.set_defaults(func=_cmd_compact)
+
+    p = sub.add_parser("purge", help="move old appointments to the appointments_archive table")
+    p.add_argument("--older-than-days", type=int, default=None, help="archive appointments created more than N days ago")
+    p.add_argument("--status", action="append", default=None, help="only archive appointments in this status (repeatable)")
+    p.add_argument("--dry-run", action="store_true", help="only report how many appointments would be archived")
+    p.add_argument("--db", default="medbot.db", help="database file (default: medbot.db)")
+    p.set_defaults(func=_cmd_purge)
+
+    p = sub.add_parser("export-model", help="write the model as memory-mappable .npy arrays")
+    p.add_argument("--out", default="medbot_model", help="output directory (default: medbot_model)")
+    p.set_defaults(func=_cmd_export_model)
+
+    p = sub.add_parser("serve", help="run the JSON API (classify / recommend / book / status)")
+    p.add_argument("--host", default="127.0.0.1", help="interface to bind (default: 127.0.0.1)")
+    p.add_argument("--port", type=int, default=8000, help="TCP port (default: 8000)")
+    p.add_argument("--verbose", action="store_true", help="log every request to stderr")
+    p.set_defaults(func=_cmd_serve)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
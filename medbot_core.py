@@ -0,0 +1,145 @@
+"""MedBot's application functions, without Streamlit.
+
+Bot replies, doctor recommendations, booking and appointment status changes
+live here so that the Streamlit app (``medbot_app.py``) and the JSON API
+(``medbot_api.py``) share one implementation.  Every function works on the
+process-wide store / roster / resource bundle unless one is passed in.
+"""
+from datetime import date, datetime
+
+from medbot_store import APPT_CSV, DB_PATH, HISTORY_CSV, OPEN_SLOT, SlotTakenError, get_store
+from medbot_doctors import get_doctor_registry
+from medbot_nlp import MIN_CONFIDENCE, find_specialties, predict_intents, prediction_cache, respond
+from medbot_resources import get_resources
+
+APPOINTMENT_STATUSES = ("Pending", "Accepted", "Rejected", "Completed")
+
+
+def default_store():
+    """The process-wide store for ``medbot.db`` (legacy files imported on first use)."""
+    return get_store(DB_PATH, appt_csv=APPT_CSV, history_csv=HISTORY_CSV)
+
+
+# -----------------------------
+# bot + doctor recommendations
+# -----------------------------
+def get_bot_response(user_input, min_confidence=MIN_CONFIDENCE, top_k=None, res=None, cache=prediction_cache):
+    """
+    Predict intent -> return (reply_from_responses, predicted_tag_or_None, follow_ups_tuple_or_None)
+    Important: do NOT use follow-up text as the immediate bot reply.
+    Predictions scoring below min_confidence get the "don't understand" reply.
+    With top_k, a 4th item is returned: the top_k [(tag, probability), ...] best first.
+    Predictions of repeated messages come from ``cache`` (pass None to bypass
+    it); the reply is still picked at random on every call.
+    """
+    res = res or get_resources()
+    try:
+        predicted_tag, ranked = predict_intents([user_input], res, top_k, min_confidence, cache)[0]
+    except Exception:
+        predicted_tag, ranked = None, []
+    reply, tag, fups = respond(predicted_tag, res)
+    if top_k:
+        return reply, tag, fups, list(ranked)
+    return reply, tag, fups
+
+
+def recommend_doctors(symptom, top_n=3, res=None, store=None):
+    # pre-ranked per-specialty lists, patched in place on roster edits
+    roster = get_doctor_registry(store or default_store())
+    return roster.index.top(find_specialties(symptom, res), top_n)
+
+
+# -----------------------------
+# appointments
+# -----------------------------
+def book_appointment(patient_id, doctor_name, doctor_username, time_slot, symptom, appt_date=None, store=None):
+    """Book a slot; returns the appointment, or None if the slot was taken meanwhile."""
+    appt = {
+        "patient": patient_id,
+        "doctor": doctor_name,
+        "doctor_username": doctor_username,
+        "date": (appt_date or date.today()).isoformat(),
+        "time": time_slot,
+        "symptom": symptom,
+        "status": "Pending",
+        "created_at": datetime.utcnow().isoformat()
+    }
+    try:
+        return (store or default_store()).add(appt)
+    except SlotTakenError:
+        return None
+
+
+def get_available_slots(doctor_username, slots, appt_date, store=None):
+    """The doctor's slots that are still free on appt_date (O(1) check per slot)."""
+    try:
+        booked = (store or default_store()).booked_slots(doctor_username, appt_date.isoformat())
+    except Exception:
+        booked = set()
+    return [s for s in slots if s not in booked]
+
+
+def get_patient_appointments(patient_id, store=None):
+    """All appointments of a patient, newest first."""
+    try:
+        return (store or default_store()).find(patient=patient_id)
+    except Exception:
+        return []
+
+
+def get_latest_patient_appointment(patient_id, store=None):
+    try:
+        return (store or default_store()).latest_for_patient(patient_id)
+    except Exception:
+        return None
+
+
+def get_doctor_appointments(doctor_id, statuses=None, store=None):
+    """Appointments booked with a doctor (optionally only some statuses), newest first."""
+    try:
+        return (store or default_store()).find(doctor_username=doctor_id, statuses=statuses)
+    except Exception:
+        return []
+
+
+def get_appointment(appt_id, store=None):
+    try:
+        return (store or default_store()).get(appt_id)
+    except Exception:
+        return None
+
+
+def update_appointment_status(appt_id, new_status, store=None):
+    try:
+        return (store or default_store()).set_status_by_id(appt_id, new_status)
+    except Exception:
+        return False
+
+
+def delete_appointment(appt_id, created_before=None, store=None):
+    """Delete one appointment by id (optionally only if created before a timestamp)."""
+    try:
+        return (store or default_store()).delete(appt_id, created_before=created_before)
+    except Exception:
+        return False
+
+
+# -----------------------------
+# patient visit history
+# -----------------------------
+def get_patient_visit_history(patient_id, store=None):
+    """Return past visits for a patient (Accepted or Completed)."""
+    try:
+        return (store or default_store()).find(patient=patient_id, statuses=("Accepted", "Completed"))
+    except Exception:
+        return []
+
+
+def mark_appointment_completed(appt_id, store=None):
+    """Complete an Accepted appointment and append a row to the history table (False otherwise)."""
+    try:
+        record = (store or default_store()).complete_by_id(appt_id, datetime.utcnow().isoformat())
+    except Exception:
+        return False
+    return record is not None
+
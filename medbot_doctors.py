@@ -0,0 +1,339 @@
+"""Doctor roster helpers: username normalisation, ranked recommendations and
+the live roster registry shared by every session."""
+import math
+import heapq
+import sqlite3
+import threading
+from bisect import bisect_left, insort
+
+
+def normalize_username(name: str) -> str:
+    s = "".join(ch for ch in str(name).lower() if ch.isalnum() or ch == "_")
+    return s.replace(" ", "_")
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def normalize_doctor(doc):
+    """Doctor record with ``slots`` as a list and a guaranteed string ``username``."""
+    raw_slots = doc.get("slots", [])
+    if isinstance(raw_slots, list):
+        slots = list(raw_slots)
+    else:
+        slots = [s.strip() for s in str(raw_slots if not _is_missing(raw_slots) else "").split(",") if s.strip()]
+    uname = doc.get("username")
+    if _is_missing(uname) or str(uname).strip() == "":
+        uname = normalize_username(str(doc.get("name", "")))
+    return {
+        "name": doc.get("name"),
+        "specialty": doc.get("specialty"),
+        "rating": doc.get("rating"),
+        "slots": slots,
+        "username": str(uname).strip(),
+    }
+
+
+def _rating(doc):
+    r = doc.get("rating")
+    try:
+        r = float(r)
+    except (TypeError, ValueError):
+        return -math.inf
+    return -math.inf if math.isnan(r) else r
+
+
+class DoctorIndex:
+    """Doctors pre-grouped by specialty, each group ranked by rating (best first).
+
+    Built once per roster load, so a recommendation is a slice of a list
+    rather than a DataFrame filter + sort.  Equal ratings keep roster order.
+    ``update``/``remove`` adjust single entries in place.
+    """
+
+    def __init__(self, doctors):
+        records = [normalize_doctor(d) for d in doctors]
+        # (-rating, roster position) gives a deterministic, stable ranking
+        self._ranked = sorted(((-_rating(d), pos), d) for pos, d in enumerate(records))
+        self._by_specialty = {}
+        for entry in self._ranked:
+            self._by_specialty.setdefault(entry[1].get("specialty"), []).append(entry)
+        self._entries = {entry[1]["username"]: entry for entry in self._ranked}
+        self._next_pos = len(records)
+
+    def __len__(self):
+        return len(self._ranked)
+
+    def copy(self):
+        """An independent index over the same (unchanged) records."""
+        clone = object.__new__(DoctorIndex)
+        clone._ranked = list(self._ranked)
+        clone._by_specialty = {k: list(v) for k, v in self._by_specialty.items()}
+        clone._entries = dict(self._entries)
+        clone._next_pos = self._next_pos
+        return clone
+
+    def specialties(self):
+        return list(self._by_specialty)
+
+    def update(self, username, doc):
+        """Insert ``doc`` (replacing ``username``'s entry, whose roster position it keeps)."""
+        old = self.remove(username)
+        if old is not None:
+            pos = old[0][1]
+        else:
+            pos, self._next_pos = self._next_pos, self._next_pos + 1
+        record = normalize_doctor(doc)
+        entry = ((-_rating(record), pos), record)
+        insort(self._ranked, entry)
+        insort(self._by_specialty.setdefault(record.get("specialty"), []), entry)
+        self._entries[record["username"]] = entry
+
+    def add(self, doc):
+        self.update(None, doc)
+
+    def remove(self, username):
+        """Drop ``username``'s entry; returns it (``(key, record)``) or None."""
+        entry = self._entries.pop(username, None)
+        if entry is None:
+            return None
+        for target in (self._ranked, self._by_specialty[entry[1].get("specialty")]):
+            del target[bisect_left(target, entry)]
+        if not self._by_specialty[entry[1].get("specialty")]:
+            del self._by_specialty[entry[1].get("specialty")]
+        return entry
+
+    def top(self, specialties, top_n=3):
+        """Best ``top_n`` doctors across ``specialties`` (all doctors if none match)."""
+        if isinstance(specialties, str):
+            specialties = [specialties]
+        groups = [self._by_specialty[s] for s in dict.fromkeys(specialties) if s in self._by_specialty]
+        if not groups:
+            chosen = self._ranked[:top_n]
+        elif len(groups) == 1:
+            chosen = groups[0][:top_n]
+        else:
+            chosen = list(heapq.merge(*(g[:top_n] for g in groups)))[:top_n]
+        return [dict(d, slots=list(d["slots"])) for _, d in chosen]
+
+
+DEFAULT_DOCTOR_PASSWORD = "doctor_pass"
+
+
+def _display_key(name):
+    return "".join(ch for ch in str(name).lower() if ch.isalnum())
+
+
+class _RosterView:
+    """One consistent version of the roster and its derived maps.
+
+    Never changed once published; writers patch a ``copy()`` and swap it in.
+    """
+
+    def __init__(self, records=()):
+        self.records = {}
+        self.sort_keys = []
+        self.display_owners = {}
+        self.users = {}
+        self.usernames = []
+        self.rows = []
+        self.display_to_uname = {}
+        for record in records:
+            self.link(record, DEFAULT_DOCTOR_PASSWORD)
+        self.index = DoctorIndex(records)
+
+    def copy(self):
+        clone = object.__new__(_RosterView)
+        clone.records = dict(self.records)
+        clone.sort_keys = list(self.sort_keys)
+        clone.display_owners = {k: list(v) for k, v in self.display_owners.items()}
+        clone.users = dict(self.users)
+        clone.usernames = list(self.usernames)
+        clone.rows = list(self.rows)
+        clone.display_to_uname = dict(self.display_to_uname)
+        clone.index = self.index.copy()
+        return clone
+
+    def link(self, record, password):
+        uname = record["username"]
+        self.records[uname] = record
+        self.users[uname] = {"password": password, "role": "Doctor", "display_name": record.get("name")}
+        key = (uname.lower(), uname)
+        i = bisect_left(self.sort_keys, key)
+        self.sort_keys.insert(i, key)
+        self.usernames.insert(i, uname)
+        self.rows.insert(i, {"username": uname, "name": record.get("name") or uname})
+        dkey = _display_key(record.get("name") or uname)
+        self.display_owners.setdefault(dkey, []).append(uname)
+        self.display_to_uname[dkey] = uname
+
+    def unlink(self, uname):
+        # leaves records alone so that an in-place update keeps its roster position
+        record = self.records[uname]
+        account = self.users.pop(uname)
+        i = bisect_left(self.sort_keys, (uname.lower(), uname))
+        del self.sort_keys[i], self.usernames[i], self.rows[i]
+        dkey = _display_key(record.get("name") or uname)
+        owners = self.display_owners[dkey]
+        owners.remove(uname)
+        if owners:
+            self.display_to_uname[dkey] = owners[-1]
+        else:
+            del self.display_owners[dkey], self.display_to_uname[dkey]
+        return account
+
+
+class DoctorRegistry:
+    """The live doctor roster and every lookup derived from it.
+
+    Loaded from the store's ``doctors`` table.  ``add``, ``update`` and
+    ``remove`` write just the one changed row and patch a copy of the derived
+    maps, instead of re-saving the roster and rebuilding the maps from
+    scratch.  Edits made by other processes are picked up by ``refresh``
+    (called by ``get_doctor_registry``), which reloads the roster when the
+    store's persisted roster counter has moved on.
+
+    Every change is published as a new ``_RosterView`` with one reference
+    swap, so sessions reading without the lock always see a complete
+    roster.  Read the maps once per rerun and keep using that object:
+
+    * ``users`` - doctor login accounts by username
+    * ``usernames`` / ``rows`` - usernames sorted case-insensitively, and the
+      matching ``{"username", "name"}`` rows for pickers
+    * ``display_to_uname`` - alphanumeric display name -> username
+    * ``index`` - the ``DoctorIndex`` behind recommendations
+    """
+
+    def __init__(self, store):
+        self._store = store
+        self._lock = threading.Lock()
+        self.version = None
+        with self._lock:
+            self._reload()
+
+    def _reload(self):
+        # counter first: a write landing in between only causes one more reload
+        version = self._store.roster_version()
+        self._view = _RosterView([normalize_doctor(d) for d in self._store.doctors()])
+        self.version = version
+
+    def _sync(self):
+        # caller holds the lock
+        if self._store.roster_version() != self.version:
+            self._reload()
+
+    def _advance(self, version):
+        """Record our own write; a gap means another process wrote too -> reload later."""
+        if version == self.version + 1:
+            self.version = version
+
+    def refresh(self):
+        """Reload the roster if any process changed it since it was loaded."""
+        with self._lock:
+            self._sync()
+        return self
+
+    @property
+    def users(self):
+        return self._view.users
+
+    @property
+    def usernames(self):
+        return self._view.usernames
+
+    @property
+    def rows(self):
+        return self._view.rows
+
+    @property
+    def display_to_uname(self):
+        return self._view.display_to_uname
+
+    @property
+    def index(self):
+        return self._view.index
+
+    def __len__(self):
+        return len(self._view.records)
+
+    def __contains__(self, username):
+        return username in self._view.records
+
+    def get(self, username):
+        record = self._view.records.get(username)
+        return None if record is None else dict(record, slots=list(record["slots"]))
+
+    def records(self):
+        """Every doctor, in roster order."""
+        return [dict(r, slots=list(r["slots"])) for r in self._view.records.values()]
+
+    def add(self, doc):
+        """Add a doctor; raises ValueError if the username is taken."""
+        record = normalize_doctor(doc)
+        with self._lock:
+            self._sync()
+            if record["username"] in self._view.records:
+                raise ValueError(f"username {record['username']!r} is already taken")
+            try:
+                version = self._store.save_doctor(record)
+            except sqlite3.IntegrityError as e:
+                # added by another process since our last sync
+                raise ValueError(f"username {record['username']!r} is already taken") from e
+            view = self._view.copy()
+            view.link(record, DEFAULT_DOCTOR_PASSWORD)
+            view.index.add(record)
+            self._view = view
+            self._advance(version)
+        return self.get(record["username"])
+
+    def update(self, username, doc):
+        """Replace ``username``'s record with ``doc`` (which may rename it)."""
+        record = normalize_doctor(doc)
+        with self._lock:
+            self._sync()
+            if username not in self._view.records:
+                raise KeyError(username)
+            if record["username"] != username and record["username"] in self._view.records:
+                raise ValueError(f"username {record['username']!r} is already taken")
+            try:
+                version = self._store.save_doctor(record, previous_username=username)
+            except sqlite3.IntegrityError as e:
+                raise ValueError(f"username {record['username']!r} is already taken") from e
+            view = self._view.copy()
+            account = view.unlink(username)
+            if record["username"] != username:
+                del view.records[username]
+            view.link(record, account["password"])
+            view.index.update(username, record)
+            self._view = view
+            self._advance(version)
+        return self.get(record["username"])
+
+    def remove(self, username):
+        """Delete a doctor and their appointments; returns the appointment count."""
+        with self._lock:
+            self._sync()
+            if username not in self._view.records:
+                raise KeyError(username)
+            removed, version = self._store.delete_doctor(username)
+            view = self._view.copy()
+            view.unlink(username)
+            del view.records[username]
+            view.index.remove(username)
+            self._view = view
+            self._advance(version)
+        return removed
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_doctor_registry(store):
+    """Process-wide roster for ``store``, revalidated against its ``doctors`` table."""
+    with _registries_lock:
+        registry = _registries.get(id(store))
+        if registry is None:
+            return _registries.setdefault(id(store), DoctorRegistry(store))
+    return registry.refresh()
@@ -0,0 +1,270 @@
+"""Compact, memory-mappable export of the intent classifier.
+
+``medbot_model.pkl`` / ``vectorizer.pkl`` are joblib pickles: every process
+unpickles its own private copy.  ``export_model`` writes the parts inference
+needs as flat ``.npy`` arrays plus a small JSON manifest::
+
+    medbot_model/
+        manifest.json           format, vectorizer settings, shapes, source hashes
+        terms.npy               vocabulary, term i = feature column i
+        idf.npy                 IDF weights (TF-IDF vectorizers only)
+        class_log_prior.npy     (n_classes,)
+        feature_log_prob.npy    (n_classes, n_features)
+        tags.npy                intent tag of each class row
+
+``load_compact_model`` maps them read-only (``np.load(mmap_mode="r")``), so
+loading costs a few ``open``/``mmap`` calls whatever the model size and all
+worker processes share the same page-cache pages.  ``NumpyEngine`` runs
+inference straight on those arrays: tokenise, look the terms up, and add the
+matching feature log-probability columns - no sklearn validation or sparse
+matrix objects per message.
+
+    python medbot_cli.py export-model
+"""
+import os
+import re
+import json
+import hashlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Optional
+
+COMPACT_MODEL_DIR = "medbot_model"
+FORMAT_VERSION = 1
+_MANIFEST = "manifest.json"
+_ARRAYS = ("terms", "idf", "class_log_prior", "feature_log_prob", "tags")
+
+
+@dataclass(frozen=True)
+class CompactModel:
+    """Read-only arrays of an exported vectorizer + naive Bayes pair."""
+    terms: Any
+    idf: Optional[Any]
+    class_log_prior: Any
+    feature_log_prob: Any
+    tags: Any
+    lowercase: bool
+    token_pattern: str
+    binary: bool
+    norm: Optional[str]
+    sublinear_tf: bool
+    sources: dict
+    path: str
+
+    @property
+    def n_features(self):
+        return self.feature_log_prob.shape[1]
+
+
+def file_digest(path):
+    """sha1 of a file's contents (ties an export to the pickles it came from)."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _vectorizer_settings(vectorizer):
+    """The settings inference has to reproduce; ValueError for unsupported ones."""
+    params = vectorizer.get_params()
+    unsupported = {
+        "analyzer": params.get("analyzer") != "word",
+        "ngram_range": tuple(params.get("ngram_range", (1, 1))) != (1, 1),
+        "tokenizer": params.get("tokenizer") is not None,
+        "preprocessor": params.get("preprocessor") is not None,
+        "strip_accents": params.get("strip_accents") is not None,
+        "stop_words": bool(params.get("stop_words")),
+    }
+    bad = [name for name, flag in unsupported.items() if flag]
+    if bad:
+        raise ValueError(f"cannot export a vectorizer with custom {', '.join(bad)}")
+    idf = getattr(vectorizer, "idf_", None) if params.get("use_idf", False) else None
+    return {
+        "lowercase": bool(params.get("lowercase", True)),
+        "token_pattern": params.get("token_pattern"),
+        "binary": bool(params.get("binary", False)),
+        "norm": params.get("norm"),
+        "sublinear_tf": bool(params.get("sublinear_tf", False)),
+    }, idf
+
+
+def _save_array(path, array):
+    import numpy as np
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, array, allow_pickle=False)
+    os.replace(tmp, path)
+
+
+def export_model(model, vectorizer, tags, out_dir=COMPACT_MODEL_DIR, sources=()):
+    """Write ``model`` + ``vectorizer`` to ``out_dir`` as flat arrays.
+
+    ``tags`` are the intent tags of ``model.classes_`` in order; ``sources``
+    are the files the objects were loaded from, recorded by hash so a stale
+    export can be detected.  The manifest is written last: readers never see
+    a half-written export as complete.  Returns the manifest.
+    """
+    import numpy as np
+
+    settings, idf = _vectorizer_settings(vectorizer)
+    vocabulary = vectorizer.vocabulary_
+    terms = np.empty(len(vocabulary), dtype=f"<U{max(map(len, vocabulary), default=1)}")
+    for term, column in vocabulary.items():
+        terms[column] = term
+    arrays = {
+        "terms": terms,
+        "idf": None if idf is None else np.ascontiguousarray(idf, dtype=np.float64),
+        "class_log_prior": np.ascontiguousarray(model.class_log_prior_, dtype=np.float64),
+        "feature_log_prob": np.ascontiguousarray(model.feature_log_prob_, dtype=np.float64),
+        "tags": np.asarray([str(t) for t in tags]),
+    }
+    n_classes, n_features = arrays["feature_log_prob"].shape
+    if len(terms) != n_features or len(arrays["tags"]) != n_classes:
+        raise ValueError("vectorizer vocabulary, model features and tags do not line up")
+
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, _MANIFEST)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    for name, array in arrays.items():
+        path = os.path.join(out_dir, f"{name}.npy")
+        if array is None:
+            if os.path.exists(path):
+                os.remove(path)
+            continue
+        _save_array(path, array)
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        **settings,
+        "n_classes": n_classes,
+        "n_features": n_features,
+        "sources": {os.path.basename(p): file_digest(p) for p in sources},
+    }
+    tmp = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, manifest_path)
+    return manifest
+
+
+def load_compact_model(path=COMPACT_MODEL_DIR, mmap=True):
+    """Map an export made by ``export_model`` (FileNotFoundError if there is none)."""
+    import numpy as np
+
+    with open(os.path.join(path, _MANIFEST), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported compact model format {manifest.get('format')!r}")
+    arrays = {}
+    for name in _ARRAYS:
+        file = os.path.join(path, f"{name}.npy")
+        if name == "idf" and not os.path.exists(file):
+            arrays[name] = None
+            continue
+        arrays[name] = np.load(file, mmap_mode="r" if mmap else None, allow_pickle=False)
+    if arrays["feature_log_prob"].shape != (manifest["n_classes"], manifest["n_features"]):
+        raise ValueError(f"{path}: arrays do not match the manifest")
+    return CompactModel(
+        **arrays,
+        lowercase=manifest["lowercase"],
+        token_pattern=manifest["token_pattern"],
+        binary=manifest["binary"],
+        norm=manifest.get("norm"),
+        sublinear_tf=manifest.get("sublinear_tf", False),
+        sources=manifest.get("sources", {}),
+        path=path,
+    )
+
+
+def is_current(compact, sources):
+    """True if ``compact`` was exported from the present contents of ``sources``."""
+    try:
+        return all(compact.sources.get(os.path.basename(p)) == file_digest(p) for p in sources)
+    except OSError:
+        return False
+
+
+class NumpyEngine:
+    """Vectorizer + multinomial naive Bayes inference on a ``CompactModel``.
+
+    Reproduces ``model.predict_proba(vectorizer.transform(texts))`` for a
+    word-unigram Count/TF-IDF vectorizer; the only per-process state is the
+    term -> column dict and the compiled token pattern.
+    """
+
+    def __init__(self, compact):
+        self.compact = compact
+        self.tags = compact.tags
+        self._columns = {str(term): i for i, term in enumerate(compact.terms)}
+        self._token = re.compile(compact.token_pattern)
+
+    def tokens(self, text):
+        """The terms the vectorizer would extract from ``text``, in order."""
+        if self.compact.lowercase:
+            text = text.lower()
+        return self._token.findall(text)
+
+    def _counts(self, text):
+        columns = self._columns
+        return Counter(columns[t] for t in self.tokens(text) if t in columns)
+
+    def _features(self, texts):
+        """Sparse rows as flat (row_starts, columns, values) arrays."""
+        import numpy as np
+
+        compact = self.compact
+        starts, columns, values = [0], [], []
+        for text in texts:
+            counts = self._counts(text)
+            columns.extend(counts)
+            values.extend(counts.values())
+            starts.append(len(columns))
+        starts = np.asarray(starts, dtype=np.intp)
+        columns = np.asarray(columns, dtype=np.intp)
+        values = np.asarray(values, dtype=np.float64)
+        if compact.binary:
+            values[:] = 1.0
+        if compact.sublinear_tf:
+            values = np.log(values) + 1.0
+        if compact.idf is not None:
+            values = values * compact.idf[columns]
+        if compact.norm and len(values):
+            lengths = np.diff(starts)
+            nonempty = lengths > 0
+            if compact.norm == "l2":
+                totals = np.add.reduceat(values * values, starts[:-1][nonempty]) ** 0.5
+            else:
+                totals = np.add.reduceat(np.abs(values), starts[:-1][nonempty])
+            values = values / np.repeat(totals, lengths[nonempty])
+        return starts, columns, values
+
+    def joint_log_likelihood(self, texts):
+        """(n_texts, n_classes) unnormalised class log-probabilities."""
+        import numpy as np
+
+        compact = self.compact
+        starts, columns, values = self._features(texts)
+        jll = np.tile(np.asarray(compact.class_log_prior), (len(texts), 1))
+        if len(columns):
+            lengths = np.diff(starts)
+            nonempty = lengths > 0
+            # one gathered column per (text, term); summed per text
+            contrib = compact.feature_log_prob[:, columns] * values
+            jll[nonempty] += np.add.reduceat(contrib, starts[:-1][nonempty], axis=1).T
+        return jll
+
+    def predict(self, texts):
+        """Class index per text (ties go to the lowest index, like sklearn)."""
+        return self.joint_log_likelihood(texts).argmax(axis=1)
+
+    def predict_proba(self, texts):
+        import numpy as np
+
+        jll = self.joint_log_likelihood(texts)
+        jll -= jll.max(axis=1, keepdims=True)
+        proba = np.exp(jll)
+        proba /= proba.sum(axis=1, keepdims=True)
+        return proba
@@ -0,0 +1,288 @@
+"""Intent classification, reply selection and specialty lookup for MedBot.
+
+Nothing here depends on Streamlit, so the same code serves the chat UI (one
+message at a time) and bulk triage (``classify_batch`` / ``classify_stream``),
+where a whole list of messages is vectorized and predicted in one sparse
+matrix call.  numpy and the model are only imported/loaded on the first
+prediction, so importing this module is cheap.  When the model has been
+exported (``medbot_cli.py export-model``), predictions run on the NumPy
+engine over the memory-mapped arrays instead of the sklearn pipeline.
+"""
+import os
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from medbot_resources import get_resources
+from medbot_specialty import get_specialty_matcher
+
+FALLBACK_REPLY = "Sorry, I don't understand. Please describe your symptom clearly."
+DEFAULT_CHUNK_SIZE = 1000
+# predictions whose top probability falls below this take the "don't understand"
+# path; 0 keeps the plain argmax behaviour.  With N intents an input sharing no
+# vocabulary with the training patterns scores ~1/N for every tag.
+MIN_CONFIDENCE = 0.0
+# worker threads shared by every chat session; the sparse vectorize/predict
+# work releases the GIL for most of its run time
+INFERENCE_WORKERS = min(4, os.cpu_count() or 1)
+# predict with medbot_model.NumpyEngine when the bundle has a current export;
+# False always goes through vectorizer.transform + model.predict
+USE_NUMPY_ENGINE = True
+# distinct normalised messages whose prediction is remembered (see PredictionCache)
+PREDICTION_CACHE_SIZE = 4096
+
+# -----------------------------
+# specialty lookup
+# -----------------------------
+# without a bundle these use the standalone matcher, so they never load the model
+def find_specialty(symptom, res=None):
+    """Best-matching specialty for a symptom or free-text message."""
+    return (res.specialty_matcher if res is not None else get_specialty_matcher()).find(symptom)
+
+
+def find_specialties(symptom, res=None):
+    """Every specialty named in a free-text message (at least one)."""
+    return (res.specialty_matcher if res is not None else get_specialty_matcher()).find_all(symptom)
+
+
+# -----------------------------
+# classification
+# -----------------------------
+def _engine(res):
+    return res.engine if USE_NUMPY_ENGINE else None
+
+
+def predict_tags(texts, res=None):
+    """Predicted intent tag for every text, from one vectorize + predict call."""
+    res = res or get_resources()
+    texts = [str(t).lower() for t in texts]
+    if not texts:
+        return []
+    engine = _engine(res)
+    if engine is not None:
+        return [str(engine.tags[i]) for i in engine.predict(texts)]
+    prediction = res.model.predict(res.vectorizer.transform(texts))
+    return list(res.le.inverse_transform(prediction)) if hasattr(res.le, "inverse_transform") else list(prediction)
+
+
+def _class_tags(res):
+    import numpy as np
+
+    engine = _engine(res)
+    if engine is not None:
+        return engine.tags
+    classes = res.model.classes_
+    return res.le.inverse_transform(classes) if hasattr(res.le, "inverse_transform") else np.asarray(classes)
+
+
+def predict_top_k(texts, k=3, res=None):
+    """Best ``k`` ``(tag, probability)`` pairs per text, best first.
+
+    All texts go through a single vectorize + ``predict_proba`` call; the
+    first pair always agrees with ``predict_tags``.
+    """
+    import numpy as np
+
+    res = res or get_resources()
+    texts = [str(t).lower() for t in texts]
+    if not texts:
+        return []
+    engine = _engine(res)
+    if engine is not None:
+        proba = engine.predict_proba(texts)
+    else:
+        proba = res.model.predict_proba(res.vectorizer.transform(texts))
+    k = max(1, min(int(k), proba.shape[1]))
+    if k < proba.shape[1]:
+        top = np.argpartition(-proba, k - 1, axis=1)[:, :k]
+    else:
+        top = np.tile(np.arange(proba.shape[1]), (proba.shape[0], 1))
+    rows = np.arange(proba.shape[0])[:, None]
+    # stable sort keeps argmax tie-breaking (lowest class index) identical to predict()
+    order = np.lexsort((top, -proba[rows, top]), axis=1)
+    top = top[rows, order]
+    tags = _class_tags(res)
+    return [[(str(tags[j]), float(proba[i, j])) for j in top[i]] for i in range(len(texts))]
+
+
+class PredictionCache:
+    """Bounded LRU map ``normalised message -> prediction``, per resource bundle.
+
+    Messages are normalised to the tokens the vectorizer extracts, so "Fever",
+    "fever!" and "  fever " share one entry - they vectorize identically, so
+    the cached prediction is exactly what the model would return.  Only the
+    prediction is stored; callers still pick the (random) reply every time.
+    The cache empties itself when it sees a bundle with a different
+    signature, i.e. after the model or intents.json was reloaded.
+    """
+
+    def __init__(self, maxsize=PREDICTION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._signature = None
+        self._analyzer = None
+        self.hits = 0
+        self.misses = 0
+
+    def _sync(self, res):
+        # caller holds the lock
+        if res.signature != self._signature:
+            self._entries.clear()
+            self._signature = res.signature
+            # the engine tokenises exactly like the vectorizer, without loading it
+            self._analyzer = res.engine.tokens if res.engine is not None else res.vectorizer.build_analyzer()
+
+    def key(self, res, text, *params):
+        """Cache key for ``text`` (plus any parameters the prediction depends on)."""
+        with self._lock:
+            self._sync(res)
+            analyzer = self._analyzer
+        return (" ".join(analyzer(str(text).lower())),) + params
+
+    def get(self, res, key):
+        """The cached value for ``key`` or None; counts a hit or a miss."""
+        with self._lock:
+            self._sync(res)
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, res, key, value):
+        with self._lock:
+            self._sync(res)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# shared by every session / API thread of the process
+prediction_cache = PredictionCache()
+
+
+def respond(predicted_tag, res=None):
+    """(reply, tag, follow_ups) for a predicted tag; the reply is picked at random."""
+    res = res or get_resources()
+    entry = res.intent_table.get(predicted_tag) if predicted_tag else None
+    if entry is None:
+        return FALLBACK_REPLY, None, None
+    # reply must come from intent['responses'] only; follow-ups are pre-normalised
+    response = random.choice(entry.responses) if entry.responses else "Sorry, I don't understand."
+    return response, predicted_tag, entry.follow_ups
+
+
+def _predictions(texts, res, top_k, min_confidence):
+    if top_k or min_confidence > 0:
+        return [(r[0][0] if r[0][1] >= min_confidence else None, r) for r in predict_top_k(texts, top_k or 1, res)]
+    return [(tag, []) for tag in predict_tags(texts, res)]
+
+
+def predict_intents(texts, res=None, top_k=None, min_confidence=MIN_CONFIDENCE, cache=None):
+    """``(tag_or_None, ranked)`` per text, ``ranked`` being the top-k pairs.
+
+    ``ranked`` is empty unless probabilities were needed (``top_k`` or a
+    ``min_confidence`` threshold).  With a ``cache``, repeated messages are
+    answered from it and only the misses go through the model, as one batch.
+    """
+    res = res or get_resources()
+    texts = list(texts)
+    if cache is None:
+        return _predictions(texts, res, top_k, min_confidence)
+    keys = [cache.key(res, text, min_confidence, top_k) for text in texts]
+    results = [cache.get(res, key) for key in keys]
+    misses = {}
+    for i, value in enumerate(results):
+        if value is None:
+            misses.setdefault(keys[i], texts[i])
+    if misses:
+        fresh = dict(zip(misses, _predictions(list(misses.values()), res, top_k, min_confidence)))
+        for key, value in fresh.items():
+            cache.put(res, key, value)
+        results = [fresh[key] if value is None else value for key, value in zip(keys, results)]
+    return results
+
+
+def classify_batch(texts, res=None, top_k=None, min_confidence=MIN_CONFIDENCE, cache=None):
+    """Classify a list of messages in one pass.
+
+    Returns one dict per input with ``text``, ``tag``, ``reply``,
+    ``follow_ups`` and the recommended ``specialty``.  With ``top_k`` (or a
+    ``min_confidence`` threshold) probabilities are computed as well, adding
+    ``confidence`` and ``candidates`` (the top-k ``(tag, probability)`` pairs);
+    predictions below ``min_confidence`` get the fallback reply and no tag.
+    Predictions are looked up in / added to ``cache`` when one is given.
+    """
+    res = res or get_resources()
+    texts = list(texts)
+    scored = bool(top_k) or min_confidence > 0
+    results = []
+    for text, (tag, ranked) in zip(texts, predict_intents(texts, res, top_k, min_confidence, cache)):
+        reply, tag, fups = respond(tag, res)
+        rec = {
+            "text": text,
+            "tag": tag,
+            "reply": reply,
+            "follow_ups": list(fups) if fups else None,
+            "specialty": find_specialty(tag or text, res),
+        }
+        if scored:
+            rec["confidence"] = ranked[0][1]
+            rec["candidates"] = list(ranked[:top_k]) if top_k else []
+        results.append(rec)
+    return results
+
+
+def classify_stream(messages, chunk_size=DEFAULT_CHUNK_SIZE, res=None, top_k=None, min_confidence=MIN_CONFIDENCE):
+    """Lazily classify an iterable of messages, ``chunk_size`` at a time."""
+    it = iter(messages)
+    while True:
+        chunk = list(islice(it, chunk_size))
+        if not chunk:
+            return
+        # pick up reloaded resources between chunks, but not within one
+        yield from classify_batch(chunk, res or get_resources(), top_k=top_k, min_confidence=min_confidence)
+
+
+# -----------------------------
+# off-thread inference
+# -----------------------------
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def inference_pool():
+    """Process-wide thread pool that runs interactive classification requests."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="medbot-infer")
+    return _pool
+
+
+def submit(fn, *args, **kwargs):
+    """Run ``fn(*args, **kwargs)`` on the inference pool; returns its Future."""
+    return inference_pool().submit(fn, *args, **kwargs)
@@ -0,0 +1,200 @@
+"""Process-wide cache of the model, vectorizer and JSON catalogues.
+
+Streamlit re-executes ``medbot_app.py`` on every interaction of every
+session.  ``get_resources()`` hands all of them the same immutable
+``Resources`` bundle and only reloads it when one of the source files changes
+on disk (checked through its mtime/size).  The doctor roster is not part of
+it: it lives in the database, see ``medbot_doctors.DoctorRegistry``.  When
+``medbot_cli.py export-model`` has been run, the bundle carries the
+memory-mapped export of the model (``medbot_model.CompactModel``) and the
+joblib pickles are only unpickled if something still asks for them.
+"""
+import os
+import json
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Optional
+
+from medbot_model import COMPACT_MODEL_DIR, NumpyEngine, is_current, load_compact_model
+from medbot_specialty import SPECIALTY_MAP_PATH, get_specialty_matcher
+
+MODEL_PATH = "medbot_model.pkl"
+VECTORIZER_PATH = "vectorizer.pkl"
+INTENTS_PATH = "intents.json"
+SYMPTOMS_PATH = "symptoms.json"
+FOLLOW_UPS_PATH = "follow_up_questions.json"
+COMPACT_MANIFEST_PATH = os.path.join(COMPACT_MODEL_DIR, "manifest.json")
+
+_SOURCES = (
+    MODEL_PATH, VECTORIZER_PATH, INTENTS_PATH, SYMPTOMS_PATH, FOLLOW_UPS_PATH, SPECIALTY_MAP_PATH,
+    COMPACT_MANIFEST_PATH,
+)
+
+
+@dataclass(frozen=True)
+class IntentEntry:
+    """Pre-normalised view of one intent: its replies and follow-up questions."""
+    responses: tuple
+    follow_ups: Optional[tuple]
+
+
+class SklearnPipeline:
+    """The pickled model / vectorizer and the tag ``LabelEncoder``, unpickled on first use.
+
+    With a current compact export nothing needs them for inference, so a
+    process that never falls back to sklearn never imports it.
+    """
+
+    def __init__(self, tags):
+        self._tags = tags
+        self._lock = threading.Lock()
+        self._loaded = None
+
+    def get(self):
+        """``(model, vectorizer, le)``, loading them the first time."""
+        loaded = self._loaded
+        if loaded is None:
+            with self._lock:
+                if self._loaded is None:
+                    self._loaded = self._load()
+                loaded = self._loaded
+        return loaded
+
+    def _load(self):
+        # heavy imports are deferred to the first load, so importing this module is cheap
+        import joblib
+        from sklearn.preprocessing import LabelEncoder
+
+        model = joblib.load(MODEL_PATH)
+        vectorizer = joblib.load(VECTORIZER_PATH)
+        le = LabelEncoder()
+        if self._tags:
+            le.fit(self._tags)
+        return model, vectorizer, le
+
+
+@dataclass(frozen=True)
+class Resources:
+    """Everything the app loads from disk; shared read-only between sessions."""
+    sklearn: SklearnPipeline
+    intents: dict
+    symptoms: list
+    follow_ups: dict
+    intent_table: Any
+    specialty_matcher: Any
+    signature: tuple
+    compact: Any = None   # memory-mapped export (medbot_model.CompactModel), if current
+    engine: Any = None    # medbot_model.NumpyEngine over ``compact``
+
+    @property
+    def model(self):
+        return self.sklearn.get()[0]
+
+    @property
+    def vectorizer(self):
+        return self.sklearn.get()[1]
+
+    @property
+    def le(self):
+        return self.sklearn.get()[2]
+
+
+def _load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _normalize_follow_ups(raw):
+    """Follow-ups as a tuple of non-empty strings, or None."""
+    if isinstance(raw, (list, tuple)):
+        cleaned = tuple(str(x).strip() for x in raw if str(x).strip())
+        return cleaned or None
+    if isinstance(raw, str) and raw.strip():
+        return (raw.strip(),)
+    return None
+
+
+def compile_intents(intents, follow_ups):
+    """Build a read-only ``tag -> IntentEntry`` map (first intent wins on duplicate tags).
+
+    ``follow_up_questions.json`` takes precedence over an intent's own
+    ``follow_up_questions`` list.
+    """
+    table = {}
+    for intent in intents.get('intents', []):
+        tag = intent.get('tag')
+        if not tag or tag in table:
+            continue
+        raw_fups = follow_ups[tag] if tag in follow_ups else intent.get('follow_up_questions')
+        table[tag] = IntentEntry(
+            responses=tuple(intent.get('responses') or ()),
+            follow_ups=_normalize_follow_ups(raw_fups),
+        )
+    return MappingProxyType(table)
+
+
+def _signature(paths):
+    """(path, mtime_ns, size) per file; missing files are recorded as None."""
+    sig = []
+    for p in paths:
+        try:
+            st = os.stat(p)
+            sig.append((p, st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            sig.append((p, None, None))
+    return tuple(sig)
+
+
+def _load_compact():
+    """The exported model if there is one matching the pickles, else None."""
+    try:
+        compact = load_compact_model(COMPACT_MODEL_DIR)
+    except (OSError, ValueError, KeyError):
+        return None
+    return compact if is_current(compact, (MODEL_PATH, VECTORIZER_PATH)) else None
+
+
+def load_resources(signature=None):
+    """Read every resource from disk into a fresh ``Resources`` bundle.
+
+    With a current compact export the pickles are left on disk (and sklearn
+    unimported) until something asks for ``model`` / ``vectorizer`` / ``le``;
+    without one they are loaded here, so a missing file fails the load.
+    """
+    intents = _load_json(INTENTS_PATH)
+    symptoms = _load_json(SYMPTOMS_PATH)
+    follow_ups = _load_json(FOLLOW_UPS_PATH) if os.path.exists(FOLLOW_UPS_PATH) else {}
+
+    pipeline = SklearnPipeline([intent['tag'] for intent in intents.get('intents', [])])
+    compact = _load_compact()
+    if compact is None:
+        pipeline.get()
+    return Resources(
+        sklearn=pipeline,
+        intents=intents,
+        symptoms=symptoms,
+        follow_ups=follow_ups,
+        intent_table=compile_intents(intents, follow_ups),
+        specialty_matcher=get_specialty_matcher(),
+        compact=compact,
+        engine=NumpyEngine(compact) if compact is not None else None,
+        signature=signature if signature is not None else _signature(_SOURCES),
+    )
+
+
+_cached = None
+_cache_lock = threading.Lock()
+
+
+def get_resources():
+    """Return the shared bundle, reloading it only if a source file changed."""
+    global _cached
+    sig = _signature(_SOURCES)
+    res = _cached
+    if res is not None and res.signature == sig:
+        return res
+    with _cache_lock:
+        if _cached is None or _cached.signature != sig:
+            _cached = load_resources(sig)
+        return _cached
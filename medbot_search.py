@@ -0,0 +1,150 @@
+"""Incremental patient-name search index for the doctor "Patient History" tab.
+
+Patient identifiers are kept in sorted lists of names and name words (prefix
+matches, ranked first) and indexed by trigram (substring matches for queries
+of three or more characters).  The index never rescans the tables: each
+``sync`` only pulls rows whose ``id`` is above the last one seen, so new
+bookings and completions from any process show up on the next search.
+"""
+import heapq
+import threading
+from bisect import bisect_left, insort
+
+DEFAULT_TOP_K = 20
+
+
+def _normalize(name):
+    return str(name).strip().lower()
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class PatientIndex:
+    """Substring / prefix index over patient identifiers with ranked top-k lookup."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._originals = {}    # normalised name -> set of original spellings
+        self._grams = {}        # trigram -> set of normalised names
+        self._names = []        # sorted normalised names
+        self._words = []        # sorted (word, normalised name) for multi-word names
+        self._appt_watermark = 0
+        self._history_watermark = 0
+        self._generation = None
+
+    def __len__(self):
+        return len(self._originals)
+
+    def add_many(self, names):
+        """Index patient identifiers (blanks and known spellings are skipped)."""
+        new_names, new_words = [], []
+        for name in names:
+            original = str(name).strip() if name is not None else ""
+            if not original:
+                continue
+            norm = original.lower()
+            known = self._originals.get(norm)
+            if known is not None:
+                known.add(original)
+                continue
+            self._originals[norm] = {original}
+            for gram in _trigrams(norm):
+                self._grams.setdefault(gram, set()).add(norm)
+            new_names.append(norm)
+            words = norm.split()
+            if len(words) > 1:
+                new_words.extend((w, norm) for w in set(words))
+        # a handful of new rows: keep lists sorted in place; a bulk load: sort once
+        for target, items in ((self._names, new_names), (self._words, new_words)):
+            if len(items) > 64:
+                target.extend(items)
+                target.sort()
+            else:
+                for item in items:
+                    insort(target, item)
+
+    def add(self, name):
+        self.add_many([name])
+
+    def _reset(self):
+        self._originals.clear()
+        self._grams.clear()
+        self._names.clear()
+        self._words.clear()
+        self._appt_watermark = self._history_watermark = 0
+
+    def sync(self, store):
+        """Pull patients written since the last sync (full rebuild after deletions)."""
+        with self._lock:
+            # persisted counter: also catches deletions/archives by other processes
+            generation = store.generation
+            if self._generation != generation:
+                self._reset()
+                self._generation = generation
+            names, self._appt_watermark, self._history_watermark = store.patients_since(
+                self._appt_watermark, self._history_watermark
+            )
+            self.add_many(names)
+
+    def search(self, query, k=DEFAULT_TOP_K):
+        """Best ``k`` patient identifiers for ``query``.
+
+        Ranking: exact match, then names starting with the query (A-Z), then
+        names with another word starting with it, then - for queries of three
+        or more characters - any other substring match (earliest position
+        first).  The first tiers are read off sorted lists and stop after
+        ``k`` hits, so common prefixes stay cheap.
+        """
+        q = _normalize(query)
+        if not q or k <= 0:
+            return []
+        with self._lock:
+            ranked = []
+            seen = set()
+
+            def take(norm):
+                if norm not in seen:
+                    seen.add(norm)
+                    ranked.append(norm)
+                return len(ranked) >= k
+
+            if q in self._originals and take(q):
+                return self._expand(ranked, k)
+            i = bisect_left(self._names, q)
+            while i < len(self._names) and self._names[i].startswith(q):
+                if take(self._names[i]):
+                    return self._expand(ranked, k)
+                i += 1
+            i = bisect_left(self._words, (q,))
+            while i < len(self._words) and self._words[i][0].startswith(q):
+                if take(self._words[i][1]):
+                    return self._expand(ranked, k)
+                i += 1
+            if len(q) >= 3:
+                postings = [self._grams.get(g) for g in _trigrams(q)]
+                if all(postings):
+                    postings.sort(key=len)
+                    found = postings[0].intersection(*postings[1:]) if len(postings) > 1 else postings[0]
+                    rest = ((norm.find(q), norm) for norm in found if norm not in seen)
+                    for _, norm in heapq.nsmallest(k - len(ranked), (r for r in rest if r[0] >= 0)):
+                        take(norm)
+            return self._expand(ranked, k)
+
+    def _expand(self, ranked, k):
+        return [o for norm in ranked for o in sorted(self._originals[norm])][:k]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_patient_index(store):
+    """Process-wide index for ``store``, synced with rows written since last call."""
+    with _indexes_lock:
+        index = _indexes.get(id(store))
+        if index is None:
+            index = _indexes[id(store)] = PatientIndex()
+    index.sync(store)
+    return index
@@ -0,0 +1,158 @@
+"""Symptom -> specialty lookup compiled from ``specialty_map.json``.
+
+The map's keys are compiled once into an Aho–Corasick automaton, so a message
+is scanned in a single pass whatever the number of keys.  Overlapping hits are
+resolved longest-first ("cold feet" beats "cold"), which keeps the answer
+independent of the order of the JSON file.
+"""
+import os
+import json
+import threading
+from bisect import bisect_right
+from collections import deque
+
+SPECIALTY_MAP_PATH = "specialty_map.json"
+DEFAULT_SPECIALTY = "General Physician"
+
+
+def load_specialty_map(path=SPECIALTY_MAP_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class SpecialtyMatcher:
+    """Multi-pattern matcher over the keys of a ``symptom -> specialty`` map."""
+
+    def __init__(self, mapping, default=DEFAULT_SPECIALTY):
+        self.default = default
+        self._keys = []
+        self._specialties = []
+        self._exact = {}
+        goto, out = [{}], [()]
+        for key, specialty in mapping.items():
+            k = str(key).lower().strip()
+            if not k or k in self._exact:
+                continue
+            self._exact[k] = specialty
+            idx = len(self._keys)
+            self._keys.append(k)
+            self._specialties.append(specialty)
+            node = 0
+            for ch in k:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                node = nxt
+            out[node] = (idx,)
+
+        # breadth-first failure links; each node's outputs include those of its
+        # failure chain (own key first, i.e. longest first)
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[nxt] = target if target != nxt else 0
+                out[nxt] = out[nxt] + out[fail[nxt]]
+                queue.append(nxt)
+        self._goto, self._fail, self._out = goto, fail, out
+
+        # "input is a fragment of a key" fallback (e.g. "chest" -> "chest pain")
+        self._joined = "\n".join(self._keys)
+        self._offsets = []
+        pos = 0
+        for k in self._keys:
+            self._offsets.append(pos)
+            pos += len(k) + 1
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _scan(self, text):
+        """Yield ``(start, end, key_index)`` for every key occurring in ``text``."""
+        goto, fail, out, keys = self._goto, self._fail, self._out, self._keys
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for idx in out[node]:
+                yield i + 1 - len(keys[idx]), i + 1, idx
+
+    def matches(self, text):
+        """Non-overlapping ``(key, specialty)`` hits in ``text``, in text order.
+
+        Where hits overlap the longest key wins, then the leftmost one.
+        """
+        text = str(text).lower().strip()
+        hits = sorted(self._scan(text), key=lambda h: (h[0] - h[1], h[0]))
+        taken = []
+        used = bytearray(len(text))
+        for start, end, idx in hits:
+            if any(used[start:end]):
+                continue
+            used[start:end] = b"\x01" * (end - start)
+            taken.append((start, idx))
+        taken.sort()
+        return [(self._keys[idx], self._specialties[idx]) for _, idx in taken]
+
+    def _fragment_of_key(self, text):
+        if not text or "\n" in text:
+            return None
+        pos = self._joined.find(text)
+        if pos < 0:
+            return None
+        return self._specialties[bisect_right(self._offsets, pos) - 1]
+
+    def find(self, text):
+        """The single best specialty for ``text`` (exact key, else longest match)."""
+        text = str(text).lower().strip()
+        if text in self._exact:
+            return self._exact[text]
+        best = None
+        for start, end, idx in self._scan(text):
+            if best is None or (end - start, -start) > (best[1] - best[0], -best[0]):
+                best = (start, end, idx)
+        if best is not None:
+            return self._specialties[best[2]]
+        return self._fragment_of_key(text) or self.default
+
+    def find_all(self, text):
+        """Every distinct specialty named in ``text``, in order of appearance."""
+        text = str(text).lower().strip()
+        if text in self._exact:
+            return [self._exact[text]]
+        found = []
+        for _, specialty in self.matches(text):
+            if specialty not in found:
+                found.append(specialty)
+        return found or [self._fragment_of_key(text) or self.default]
+
+
+_matcher = None
+_matcher_sig = None
+_matcher_lock = threading.Lock()
+
+
+def get_specialty_matcher(path=SPECIALTY_MAP_PATH):
+    """Process-wide matcher for ``path``, rebuilt only when the file changes."""
+    global _matcher, _matcher_sig
+    try:
+        st = os.stat(path)
+        sig = (path, st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        sig = (path, None, None)
+    if _matcher is not None and _matcher_sig == sig:
+        return _matcher
+    with _matcher_lock:
+        if _matcher is None or _matcher_sig != sig:
+            _matcher = SpecialtyMatcher(load_specialty_map(path))
+            _matcher_sig = sig
+        return _matcher
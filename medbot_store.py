@@ -0,0 +1,624 @@
+"""SQLite-backed appointment, visit-history and doctor-roster storage for MedBot.
+
+The tables live in ``medbot.db`` next to the app.  The legacy CSV files and
+``doctors.json`` are imported once, the first time a database is opened;
+after that every booking, status change or roster edit is a single-row
+statement instead of a full-file rewrite.
+"""
+import os
+import csv
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from medbot_doctors import normalize_doctor
+
+DB_PATH = "medbot.db"
+APPT_CSV = "appointments.csv"
+HISTORY_CSV = "patient_history.csv"
+DOCTORS_JSON = "doctors.json"
+# seconds a writer waits for another connection's write transaction to finish
+BUSY_TIMEOUT = 30.0
+
+APPT_FIELDS = ("patient", "doctor", "doctor_username", "date", "time", "symptom", "status", "created_at")
+HISTORY_FIELDS = ("patient", "doctor_username", "doctor", "time", "symptom", "completed_at")
+DOCTOR_FIELDS = ("username", "name", "specialty", "rating", "slots")
+
+# bumped whenever the on-disk layout changes; 1 == base tables + CSV import done,
+# 2 == appointments.date (slot availability), 3 == doctors table seeded from doctors.json
+SCHEMA_VERSION = 3
+
+# statuses that keep a doctor's (date, time) slot occupied; Rejected frees it
+SLOT_HOLDING_STATUSES = ("Pending", "Accepted", "Completed")
+# pseudo-slot offered for doctors without fixed slots; never exclusive
+OPEN_SLOT = "Any time"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS appointments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient TEXT NOT NULL,
+    doctor_username TEXT,
+    doctor TEXT,
+    time TEXT,
+    symptom TEXT,
+    status TEXT,
+    created_at TEXT,
+    date TEXT
+);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient TEXT,
+    doctor_username TEXT,
+    doctor TEXT,
+    time TEXT,
+    symptom TEXT,
+    completed_at TEXT
+);
+CREATE TABLE IF NOT EXISTS doctors (
+    username TEXT PRIMARY KEY,
+    name TEXT,
+    specialty TEXT,
+    rating REAL,
+    slots TEXT
+);
+CREATE TABLE IF NOT EXISTS appointments_archive (
+    id INTEGER PRIMARY KEY,
+    patient TEXT NOT NULL,
+    doctor_username TEXT,
+    doctor TEXT,
+    time TEXT,
+    symptom TEXT,
+    status TEXT,
+    created_at TEXT,
+    date TEXT,
+    archived_at TEXT
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+_SLOT_PREDICATE = "status IN (%s) AND time <> '%s'" % (
+    ", ".join(f"'{s}'" for s in SLOT_HOLDING_STATUSES), OPEN_SLOT,
+)
+
+# created after migrations so that they can refer to columns added by them
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_appt_patient ON appointments(patient);
+CREATE INDEX IF NOT EXISTS idx_appt_doctor ON appointments(doctor_username);
+CREATE INDEX IF NOT EXISTS idx_appt_patient_created ON appointments(patient, created_at);
+CREATE INDEX IF NOT EXISTS idx_appt_patient_status ON appointments(patient, status, created_at);
+CREATE INDEX IF NOT EXISTS idx_appt_doctor_status ON appointments(doctor_username, status, created_at);
+CREATE INDEX IF NOT EXISTS idx_appt_status_created ON appointments(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_appt_created ON appointments(created_at);
+CREATE INDEX IF NOT EXISTS idx_appt_patient_doctor ON appointments(patient, doctor_username, status, created_at);
+CREATE INDEX IF NOT EXISTS idx_history_patient_doctor ON history(patient, doctor_username, completed_at);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_appt_slot ON appointments(doctor_username, date, time)
+    WHERE %s;
+""" % _SLOT_PREDICATE
+
+
+# the visit history is an append-only log: rows are only ever INSERTed
+_HISTORY_GUARDS = """
+CREATE TRIGGER IF NOT EXISTS history_append_only_update BEFORE UPDATE ON history
+BEGIN
+    SELECT RAISE(ABORT, 'history is append-only');
+END;
+CREATE TRIGGER IF NOT EXISTS history_append_only_delete BEFORE DELETE ON history
+BEGIN
+    SELECT RAISE(ABORT, 'history is append-only');
+END;
+"""
+
+# persisted change counters (``counters`` table), bumped in the same transaction
+# as the change so that every process can tell its cached copy is stale
+ROSTER_COUNTER = "doctors"
+# bumped by anything that removes appointments, so id-watermark readers rebuild
+REMOVAL_COUNTER = "appointment_removals"
+
+
+def _run_script(conn, script):
+    """Execute a multi-statement script inside the caller's transaction.
+
+    (``executescript`` would COMMIT the open transaction first.)
+    """
+    stmt = ""
+    for line in script.splitlines(keepends=True):
+        stmt += line
+        if sqlite3.complete_statement(stmt):
+            conn.execute(stmt)
+            stmt = ""
+    if stmt.strip():
+        conn.execute(stmt)
+
+
+SORTABLE_FIELDS = ("created_at", "date", "time", "patient", "doctor_username", "status", "id")
+
+
+def _filters(patient=None, doctor_username=None, statuses=None, patient_prefix=None,
+             created_from=None, created_before=None):
+    """SQL ``WHERE`` clause (or "") and its parameters for appointment filters.
+
+    ``created_from`` is inclusive and ``created_before`` exclusive; both are
+    ISO strings compared against ``created_at``.
+    """
+    clauses, params = [], []
+    if patient is not None:
+        clauses.append("patient = ?")
+        params.append(patient)
+    if patient_prefix:
+        # a range rather than LIKE, so idx_appt_patient can serve it
+        clauses.append("patient >= ? AND patient < ?")
+        params.extend([patient_prefix, patient_prefix + "\U0010ffff"])
+    if doctor_username is not None:
+        clauses.append("doctor_username = ?")
+        params.append(doctor_username)
+    if statuses:
+        statuses = list(statuses)
+        clauses.append(f"status IN ({', '.join('?' * len(statuses))})")
+        params.extend(statuses)
+    if created_from:
+        clauses.append("created_at >= ?")
+        params.append(created_from)
+    if created_before:
+        clauses.append("created_at < ?")
+        params.append(created_before)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+class SlotTakenError(Exception):
+    """The requested doctor/date/time slot is already booked."""
+
+
+def _read_csv_rows(path, fields):
+    """Yield dicts restricted to ``fields`` from a CSV file (empty cells -> None)."""
+    if not path or not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            rec = {k: (row.get(k) or None) for k in fields}
+            if rec.get("patient"):
+                yield rec
+
+
+def _doctor_row(doc):
+    slots = doc.get("slots") or []
+    if isinstance(slots, (list, tuple)):
+        slots = ",".join(str(s).strip() for s in slots if str(s).strip())
+    return (doc["username"], doc.get("name"), doc.get("specialty"), doc.get("rating"), slots)
+
+
+class AppointmentStore:
+    """Appointments + completed-visit history kept in SQLite.
+
+    One instance is shared by every session of a process; a lock serialises
+    access to the underlying connection.  Across processes the database runs
+    in WAL mode and every write is a ``BEGIN IMMEDIATE`` transaction, so
+    concurrent writers queue on SQLite's write lock (waiting up to
+    ``busy_timeout`` seconds) instead of overwriting each other.
+    """
+
+    def __init__(self, db_path=DB_PATH, appt_csv=None, history_csv=None, busy_timeout=BUSY_TIMEOUT,
+                 doctors_json=DOCTORS_JSON):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        # autocommit mode: transactions are opened explicitly by _write()
+        self._conn = sqlite3.connect(db_path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._write() as conn:
+            _run_script(conn, _SCHEMA)
+        self._migrate(appt_csv, history_csv, doctors_json)
+        with self._write() as conn:
+            _run_script(conn, _INDEXES)
+
+    @contextmanager
+    def _write(self):
+        """Write transaction holding both the thread lock and SQLite's write lock."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._conn.execute("COMMIT")
+
+    # -----------------------------
+    # setup
+    # -----------------------------
+    def _migrate(self, appt_csv, history_csv, doctors_json):
+        # one transaction, so only the first of several starting processes imports
+        with self._write():
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            # add columns first so the CSV import below sees the current layout
+            cols = {r["name"] for r in self._conn.execute("PRAGMA table_info(appointments)")}
+            if "date" not in cols:
+                # legacy rows have no appointment date; NULL never clashes in idx_appt_slot
+                self._conn.execute("ALTER TABLE appointments ADD COLUMN date TEXT")
+            if version < 1:
+                self._import_csv(appt_csv, history_csv)
+            if version < 3:
+                self._import_doctors(doctors_json)
+            _run_script(self._conn, _HISTORY_GUARDS)
+            if version < SCHEMA_VERSION:
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _import_csv(self, appt_csv, history_csv):
+        """One-off import of the legacy CSV files (only into empty tables)."""
+        if not self._conn.execute("SELECT 1 FROM appointments LIMIT 1").fetchone():
+            self._conn.executemany(
+                f"INSERT INTO appointments ({', '.join(APPT_FIELDS)}) VALUES ({', '.join('?' * len(APPT_FIELDS))})",
+                [tuple(r[k] for k in APPT_FIELDS) for r in _read_csv_rows(appt_csv, APPT_FIELDS)],
+            )
+        if not self._conn.execute("SELECT 1 FROM history LIMIT 1").fetchone():
+            self._conn.executemany(
+                f"INSERT INTO history ({', '.join(HISTORY_FIELDS)}) VALUES ({', '.join('?' * len(HISTORY_FIELDS))})",
+                [tuple(r[k] for k in HISTORY_FIELDS) for r in _read_csv_rows(history_csv, HISTORY_FIELDS)],
+            )
+
+    def _import_doctors(self, path):
+        """Replace the ``doctors`` table with the legacy ``doctors.json`` roster."""
+        if not path or not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            roster = [normalize_doctor(d) for d in json.load(f)]
+        self._conn.execute("DELETE FROM doctors")
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO doctors ({', '.join(DOCTOR_FIELDS)}) VALUES ({', '.join('?' * len(DOCTOR_FIELDS))})",
+            [_doctor_row(d) for d in roster],
+        )
+        self._bump(ROSTER_COUNTER)
+
+    def _bump(self, name):
+        """Increment a change counter inside the caller's transaction; returns the new value."""
+        self._conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+        return self._conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()[0]
+
+    def counter(self, name):
+        """Current value of a change counter (0 if it was never bumped)."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # -----------------------------
+    # appointments
+    # -----------------------------
+    def all(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM appointments ORDER BY id").fetchall()
+        return [dict(r) for r in rows]
+
+    def find(self, patient=None, doctor_username=None, statuses=None, limit=None):
+        """Appointments matching the given filters, newest ``created_at`` first.
+
+        Every filter combination is served by one of the ``idx_appt_*``
+        indexes, so a lookup costs O(log n + k) rather than a table scan.
+        """
+        clauses, params = _filters(patient=patient, doctor_username=doctor_username, statuses=statuses)
+        sql = "SELECT * FROM appointments" + clauses + " ORDER BY created_at DESC, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(r) for r in rows]
+
+    def page(self, limit=50, offset=0, sort="created_at", descending=True, **filters):
+        """One page of appointments matching ``filters``, sorted by ``sort``.
+
+        ``filters`` are those of ``_filters`` (status, doctor, patient or
+        patient prefix, created_at range); filtering, sorting and paging all
+        happen in SQLite.
+        """
+        if sort not in SORTABLE_FIELDS:
+            raise ValueError(f"cannot sort appointments by {sort!r}")
+        clauses, params = _filters(**filters)
+        direction = "DESC" if descending else "ASC"
+        sql = (
+            "SELECT * FROM appointments" + clauses
+            + f" ORDER BY {sort} {direction}, id {direction} LIMIT ? OFFSET ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, params + [int(limit), int(offset)]).fetchall()
+        return [dict(r) for r in rows]
+
+    def count(self, **filters):
+        """Number of appointments matching ``filters`` (see ``page``)."""
+        clauses, params = _filters(**filters)
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM appointments" + clauses, params).fetchone()[0]
+
+    def latest_for_patient(self, patient):
+        rows = self.find(patient=patient, limit=1)
+        return rows[0] if rows else None
+
+    def add(self, appt):
+        """Insert one appointment and return it with its new ``id``.
+
+        Raises SlotTakenError if the doctor's (date, time) slot is already held;
+        the check and the insert are one statement, so two concurrent bookings
+        of the same slot cannot both succeed.
+        """
+        values = tuple(appt.get(k) for k in APPT_FIELDS)
+        try:
+            with self._write():
+                cur = self._conn.execute(
+                    f"INSERT INTO appointments ({', '.join(APPT_FIELDS)}) VALUES ({', '.join('?' * len(APPT_FIELDS))})",
+                    values,
+                )
+        except sqlite3.IntegrityError as e:
+            raise SlotTakenError(f"{appt.get('doctor_username')} is already booked on {appt.get('date')} at {appt.get('time')}") from e
+        return dict(appt, id=cur.lastrowid)
+
+    def booked_slots(self, doctor_username, date):
+        """Set of time slots already held for a doctor on a date (via idx_appt_slot)."""
+        # the WHERE clause repeats the index predicate literally so SQLite can use it
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT time FROM appointments WHERE doctor_username = ? AND date = ? AND {_SLOT_PREDICATE}",
+                (doctor_username, date),
+            ).fetchall()
+        return {r["time"] for r in rows}
+
+    def get(self, appt_id):
+        """The appointment with primary key ``appt_id``, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM appointments WHERE id = ?", (appt_id,)).fetchone()
+        return dict(row) if row else None
+
+    def set_status_by_id(self, appt_id, new_status):
+        """Update one appointment by primary key; True if it exists and changed.
+
+        Re-activating a rejected appointment fails (False) when its slot has
+        been booked by someone else in the meantime.
+        """
+        try:
+            with self._write():
+                cur = self._conn.execute("UPDATE appointments SET status = ? WHERE id = ?", (new_status, appt_id))
+        except sqlite3.IntegrityError:
+            return False
+        return cur.rowcount == 1
+
+    def complete_by_id(self, appt_id, completed_at):
+        """Mark an appointment Completed and append the visit to ``history``.
+
+        Only Accepted appointments can be completed, so each visit is recorded
+        once.  Both happen in one transaction and each is a single-row
+        statement, so the cost does not grow with the size of the history.
+        Returns the history record, or None when no Accepted appointment has
+        that id.
+        """
+        with self._write():
+            cur = self._conn.execute(
+                "UPDATE appointments SET status = 'Completed' WHERE id = ? AND status = 'Accepted'", (appt_id,)
+            )
+            if cur.rowcount != 1:
+                return None
+            appt = self._conn.execute(
+                "SELECT patient, doctor, doctor_username, time, symptom FROM appointments WHERE id = ?", (appt_id,)
+            ).fetchone()
+            record = {
+                "patient": appt["patient"],
+                "doctor_username": appt["doctor_username"],
+                "doctor": appt["doctor"],
+                "time": appt["time"],
+                "symptom": appt["symptom"],
+                "completed_at": completed_at,
+            }
+            self._conn.execute(
+                f"INSERT INTO history ({', '.join(HISTORY_FIELDS)}) VALUES ({', '.join('?' * len(HISTORY_FIELDS))})",
+                tuple(record[k] for k in HISTORY_FIELDS),
+            )
+        return record
+
+    def delete(self, appt_id, created_before=None):
+        """Delete one appointment by primary key; True if a row was removed.
+
+        With ``created_before`` (an ISO timestamp) the row is only removed if
+        it was created earlier, checked in the same statement.
+        """
+        sql, params = "DELETE FROM appointments WHERE id = ?", [appt_id]
+        if created_before is not None:
+            sql += " AND created_at < ?"
+            params.append(created_before)
+        with self._write():
+            cur = self._conn.execute(sql, params)
+            if cur.rowcount:
+                self._bump(REMOVAL_COUNTER)
+        return cur.rowcount == 1
+
+    # -----------------------------
+    # doctors
+    # -----------------------------
+    def doctors(self):
+        """The doctor roster in insertion order (``slots`` as stored, comma-separated)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM doctors ORDER BY rowid").fetchall()
+        return [dict(r) for r in rows]
+
+    @property
+    def generation(self):
+        """Bumped (by any process) whenever appointments are deleted or archived."""
+        return self.counter(REMOVAL_COUNTER)
+
+    def roster_version(self):
+        """Counter bumped by every roster write, from any process."""
+        return self.counter(ROSTER_COUNTER)
+
+    def save_doctor(self, doc, previous_username=None):
+        """Insert a doctor, or update (and possibly rename) ``previous_username``'s row.
+
+        Returns the roster counter after the write.  Raises
+        ``sqlite3.IntegrityError`` when the username is already taken (also by
+        a doctor another process just added) and ``KeyError`` when
+        ``previous_username`` no longer exists.
+        """
+        row = _doctor_row(doc)
+        with self._write():
+            if previous_username is None:
+                self._conn.execute(
+                    f"INSERT INTO doctors ({', '.join(DOCTOR_FIELDS)}) VALUES ({', '.join('?' * len(DOCTOR_FIELDS))})",
+                    row,
+                )
+            else:
+                cur = self._conn.execute(
+                    f"UPDATE doctors SET {', '.join(f'{k} = ?' for k in DOCTOR_FIELDS)} WHERE username = ?",
+                    row + (previous_username,),
+                )
+                if not cur.rowcount:
+                    raise KeyError(previous_username)
+            return self._bump(ROSTER_COUNTER)
+
+    def delete_doctor(self, username):
+        """Remove a doctor and every appointment booked with them.
+
+        Returns ``(appointments_removed, roster_counter)``; ``KeyError`` if the
+        doctor no longer exists.
+        """
+        with self._write():
+            if not self._conn.execute("DELETE FROM doctors WHERE username = ?", (username,)).rowcount:
+                raise KeyError(username)
+            cur = self._conn.execute("DELETE FROM appointments WHERE doctor_username = ?", (username,))
+            if cur.rowcount:
+                self._bump(REMOVAL_COUNTER)
+            return cur.rowcount, self._bump(ROSTER_COUNTER)
+
+    # -----------------------------
+    # history
+    # -----------------------------
+    def history(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM history ORDER BY id").fetchall()
+        return [dict(r) for r in rows]
+
+    def _timeline_sql(self, columns):
+        # accepted/completed appointments + history rows of one (patient, doctor) pair;
+        # both halves are index range scans (idx_appt_patient_doctor, idx_history_patient_doctor)
+        return f"""
+            SELECT {columns} FROM (
+                SELECT 0 AS source, id, patient, doctor_username, doctor, date, time, symptom, status,
+                       created_at, NULL AS completed_at
+                FROM appointments
+                WHERE doctor_username = :doctor AND status IN ('Accepted', 'Completed') AND patient = :patient
+                UNION ALL
+                SELECT 1 AS source, id, patient, doctor_username, doctor, NULL, time, symptom, NULL,
+                       NULL, completed_at
+                FROM history
+                WHERE patient = :patient AND doctor_username = :doctor
+            )
+        """
+
+    def timeline(self, patient, doctor_username, limit=None, offset=0):
+        """One patient's visits with one doctor, newest first, optionally one page of them.
+
+        Rows are accepted/completed appointments (with ``created_at``) and
+        history records (with ``completed_at``), merged on whichever is set.
+        """
+        sql = self._timeline_sql("*") + " ORDER BY COALESCE(created_at, completed_at) DESC, source, id"
+        params = {"patient": patient, "doctor": doctor_username}
+        if limit is not None:
+            sql += " LIMIT :limit OFFSET :offset"
+            params.update(limit=int(limit), offset=int(offset))
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [{k: r[k] for k in r.keys() if k != "source"} for r in rows]
+
+    def timeline_count(self, patient, doctor_username):
+        with self._lock:
+            return self._conn.execute(
+                self._timeline_sql("COUNT(*)"), {"patient": patient, "doctor": doctor_username}
+            ).fetchone()[0]
+
+    def patients_since(self, appt_id=0, history_id=0):
+        """Patients on appointment/history rows newer than the given ids.
+
+        Returns ``(names, last_appt_id, last_history_id)`` so callers can keep
+        an index current by passing the returned ids back next time.
+        """
+        with self._lock:
+            appts = self._conn.execute(
+                "SELECT id, patient FROM appointments WHERE id > ? ORDER BY id", (appt_id,)
+            ).fetchall()
+            hist = self._conn.execute(
+                "SELECT id, patient FROM history WHERE id > ? ORDER BY id", (history_id,)
+            ).fetchall()
+        names = [r["patient"] for r in appts] + [r["patient"] for r in hist]
+        return names, (appts[-1]["id"] if appts else appt_id), (hist[-1]["id"] if hist else history_id)
+
+
+    # -----------------------------
+    # maintenance
+    # -----------------------------
+    def archive(self, created_before=None, statuses=None, archived_at=None):
+        """Move matching appointments to ``appointments_archive`` in one transaction.
+
+        Selects appointments created before ``created_before`` (ISO string)
+        and/or in ``statuses``; at least one of the two is required.  The
+        copy and the delete are two set-based statements, so a purge of any
+        size is a single pass.  Returns ``(rows_archived, seconds)``.
+        """
+        if not created_before and not statuses:
+            raise ValueError("archive() needs a created_before cutoff or statuses")
+        clauses, params = _filters(statuses=statuses, created_before=created_before)
+        cols = ", ".join(("id",) + APPT_FIELDS)
+        started = time.perf_counter()
+        with self._write():
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO appointments_archive ({cols}, archived_at) "
+                f"SELECT {cols}, ? FROM appointments{clauses}",
+                [archived_at or datetime.utcnow().isoformat()] + params,
+            )
+            moved = self._conn.execute("DELETE FROM appointments" + clauses, params).rowcount
+            if moved:
+                self._bump(REMOVAL_COUNTER)
+        return moved, time.perf_counter() - started
+
+    def compact(self):
+        """Fold the write-ahead log back into the database file and refresh planner stats.
+
+        Only run on demand (``medbot_cli.py compact``): the append-only
+        ``history`` table leaves no dead rows to reclaim, and SQLite's
+        automatic checkpoint already keeps the WAL bounded between runs.
+        The TRUNCATE checkpoint waits, up to the busy timeout, for other
+        connections; a checkpoint still blocked by readers is simply partial.
+        Returns SQLite's ``(busy, wal_pages, checkpointed_pages)`` triple.
+        """
+        with self._lock:
+            result = tuple(self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone())
+            self._conn.execute("PRAGMA optimize")
+        return result
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(db_path=DB_PATH, appt_csv=APPT_CSV, history_csv=HISTORY_CSV, doctors_json=DOCTORS_JSON):
+    """Process-wide store for ``db_path`` (opened, and legacy files imported, on first use).
+
+    The legacy files default to the app's, so whichever entry point (app, API
+    or CLI) opens a fresh database first performs the same one-off import.
+    """
+    key = os.path.abspath(db_path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = AppointmentStore(
+                db_path, appt_csv=appt_csv, history_csv=history_csv, doctors_json=doctors_json,
+            )
+    return store
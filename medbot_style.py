@@ -0,0 +1,55 @@
+"""Stylesheet bundling for the Streamlit app.
+
+The app's ``<style>`` blocks are minified and concatenated once per process;
+every rerun then sends the cached result as a single ``<style>`` element.  (Streamlit's static file serving is not an option for
+stylesheets: it serves ``.css`` as ``text/plain`` with ``nosniff``, which
+browsers refuse to apply.)
+"""
+import re
+import threading
+
+_STYLE_BODY = re.compile(r"<style[^>]*>(.*?)</style>", re.S | re.I)
+_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+# string literals are matched first so their contents are left untouched
+_TOKENS = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|\s*([{};,>])\s*|(:)\s+|(\s+)""")
+
+
+def minify_css(css):
+    """Strip comments and redundant whitespace from a stylesheet."""
+    css = _COMMENT.sub("", css)
+
+    def repl(m):
+        string, punct, colon, space = m.groups()
+        if string is not None:
+            return string
+        if space is not None:
+            return " "
+        return punct if punct is not None else colon
+
+    return _TOKENS.sub(repl, css).replace(";}", "}").strip()
+
+
+def _style_body(block):
+    """CSS inside a ``<style>`` block (the block itself if it has no tags)."""
+    bodies = _STYLE_BODY.findall(block)
+    return "\n".join(bodies) if bodies else block
+
+
+_bundles = {}
+_bundles_lock = threading.Lock()
+
+
+def style_markup(*blocks):
+    """One minified ``<style>`` element that applies ``blocks``, in order.
+
+    The markup is built once per process for a given set of blocks; later
+    calls are a dictionary lookup.
+    """
+    markup = _bundles.get(blocks)
+    if markup is None:
+        with _bundles_lock:
+            markup = _bundles.get(blocks)
+            if markup is None:
+                minified = "".join(minify_css(_style_body(b)) for b in blocks)
+                markup = _bundles[blocks] = f"<style>{minified}</style>"
+    return markup